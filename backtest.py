@@ -0,0 +1,223 @@
+"""
+Offline backtest of the top gainers momentum strategy on stored daily klines.
+
+Each simulated day replays one bot cycle at the daily close: liquidate every
+position (sell quantities floored to the step size, as sell_all does), rank
+symbols by their change over the lookback window, keep those with a positive
+24h change above the threshold, and buy the top N with equal USDT amounts
+(quantities floored to the step size, as the exchange fills quoteOrderQty
+orders), filling empty slots with BTCUSDT. Fees are charged on both sides.
+
+Every parameter combination is simulated at once: the time loop is shared and
+each day is a handful of array operations over all combinations.
+
+Usage:
+    python backtest.py download 2023-01-01   # backfill klines into the store
+    python backtest.py [start_date] [end_date]
+"""
+import sys
+import itertools
+from datetime import datetime, timezone
+import numpy as np
+import config
+import kline_store
+import kline_fetcher
+import quantize
+import symbol_filters
+
+KLINE_INTERVAL = '1d'
+FALLBACK_SYMBOL = 'BTCUSDT'
+
+# Spot taker fee and the per-token USDT reserve subtracted by bot.buy_tokens
+TAKER_FEE = 0.001
+FEE_RESERVE = 0.1
+INITIAL_USDT = 1000.0
+
+def date_to_ms(date_str):
+    return int(datetime.strptime(date_str, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+def download_history(client, symbols, start_ms, store=None):
+    """Backfill daily klines from start_ms into the kline store."""
+    store = store or kline_store.get_store()
+    for result in kline_fetcher.fetch_klines(client, symbols, KLINE_INTERVAL, start_ms):
+        if result['error'] is not None:
+            print(f"Error downloading {result['symbol']}: {result['error']}")
+            continue
+        store.save(result['symbol'], KLINE_INTERVAL, result['klines'])
+
+def load_history(start_ms=0, end_ms=None, store=None):
+    """
+    Load stored daily closes into a (days x symbols) float64 matrix.
+    Missing candles are NaN. Returns open times, symbols and the matrix.
+    """
+    store = store or kline_store.get_store()
+    rows = store.load_closes(KLINE_INTERVAL, start_ms, end_ms)
+    times = sorted({row[1] for row in rows})
+    symbols = sorted({row[0] for row in rows})
+    time_index = {t: i for i, t in enumerate(times)}
+    symbol_index = {s: i for i, s in enumerate(symbols)}
+    closes = np.full((len(times), len(symbols)), np.nan)
+    for symbol, open_time, close in rows:
+        closes[time_index[open_time], symbol_index[symbol]] = close
+    return np.array(times), symbols, closes
+
+def step_sizes(symbols):
+    """
+    Step size per symbol from the cached symbol filters, fetched from
+    exchangeInfo when there is no cache on disk; 0 disables rounding.
+    """
+    if not symbol_filters.index.symbols:
+        try:
+            from clients import client
+            symbol_filters.index.refresh(client)
+        except Exception as e:
+            print(f"Error fetching symbol filters, backtesting without step-size rounding: {e}")
+    filters = symbol_filters.index.symbols
+    return np.array([
+        (filters.get(symbol) or {}).get('step_size') or 0.0 for symbol in symbols
+    ])
+
+def step_units(steps):
+    """Integer (scale, step units) of every step size, from quantize.step_scale; a zero step gives (0, 0)."""
+    scales = np.zeros(len(steps))
+    units = np.zeros(len(steps))
+    for i, step in enumerate(steps):
+        if step > 0:
+            scales[i], units[i], _ = quantize.step_scale(float(step))
+    return scales, units
+
+def floor_to_step(quantity, scales, units):
+    """
+    Round quantities down to their step size with the same exact integer
+    floor as quantize.floor_to_step, so a sale never exceeds the quantity
+    held. A zero scale leaves the quantity unrounded.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        floored = np.floor(quantity * scales)
+        floored -= floored / scales > quantity
+        floored += (floored + 1) / scales <= quantity
+        # The modulo is the costliest step; power-of-ten step sizes (one unit) skip it
+        if (units > 1).any():
+            floored -= floored % units
+        return np.where(scales > 0, floored / scales, quantity)
+
+def rank_candidates(closes, lookback, max_n):
+    """
+    For every day, return the indices and lookback changes of the max_n best
+    symbols with a positive 24h change, sorted by change descending.
+    Same rule as momentum.score, applied to all days at once.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        change = np.full(closes.shape, np.nan)
+        change[lookback - 1:] = (closes[lookback - 1:] / closes[:len(closes) - lookback + 1] - 1) * 100
+        change_24h = np.full(closes.shape, np.nan)
+        change_24h[1:] = closes[1:] / closes[:-1] - 1
+    key = np.where((change_24h > 0) & np.isfinite(change), change, -np.inf)
+    order = np.argsort(-key, axis=1, kind='stable')[:, :max_n]
+    return order, np.take_along_axis(key, order, axis=1)
+
+def simulate(closes, steps, fallback_index, lookbacks, thresholds, top_ns,
+             fee=TAKER_FEE, fee_reserve=FEE_RESERVE, initial_usdt=INITIAL_USDT):
+    """
+    Simulate one daily rebalance per day for every parameter combination.
+    lookbacks, thresholds and top_ns are equal-length arrays, one entry per
+    combination. Returns final values, maximum drawdowns (percent) and the
+    number of orders placed, one entry per combination.
+    """
+    lookbacks = np.asarray(lookbacks)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    top_ns = np.asarray(top_ns)
+    num_combos = len(lookbacks)
+    max_n = int(top_ns.max())
+    num_days = len(closes)
+
+    # Candidate rankings for each distinct lookback, shared by its combinations
+    unique_lookbacks, lookback_index = np.unique(lookbacks, return_inverse=True)
+    ranked = [rank_candidates(closes, int(lookback), max_n) for lookback in unique_lookbacks]
+    orders = np.stack([order for order, _ in ranked])
+    changes = np.stack([change for _, change in ranked])
+
+    scales, units = step_units(steps)
+    slot_active = np.arange(max_n)[None, :] < top_ns[:, None]
+    cash = np.full(num_combos, initial_usdt)
+    held = np.full((num_combos, max_n), fallback_index)
+    quantity = np.zeros((num_combos, max_n))
+    value = cash.copy()
+    peak = cash.copy()
+    max_drawdown = np.zeros(num_combos)
+    order_count = np.zeros(num_combos, dtype=np.int64)
+
+    for t in range(int(unique_lookbacks.max()) - 1, num_days - 1):
+        prices = closes[t]
+
+        # Liquidate yesterday's positions; the unsellable remainder is swept as dust
+        sold = floor_to_step(quantity, scales[held], units[held])
+        proceeds = np.nan_to_num(sold * prices[held]) * (1 - fee)
+        cash = cash + proceeds.sum(axis=1)
+        order_count += (sold > 0).sum(axis=1)
+
+        # Pick today's top gainers, filling empty slots with the fallback symbol
+        day_orders = orders[lookback_index, t]
+        passes = changes[lookback_index, t] > thresholds[:, None]
+        held = np.where(passes & slot_active, day_orders, fallback_index)
+
+        # Equal-weight quoteOrderQty buys: the exchange floors the bought quantity
+        # to the step size and charges only for that, and the fee is paid out of it
+        allocation = cash / top_ns - fee_reserve
+        buy_prices = prices[held]
+        can_buy = slot_active & np.isfinite(buy_prices) & (allocation > 0)[:, None]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            bought = floor_to_step(allocation[:, None] / buy_prices, scales[held], units[held])
+        bought = np.where(can_buy, bought, 0.0)
+        quantity = bought * (1 - fee)
+        cash = cash - np.nan_to_num(bought * buy_prices).sum(axis=1)
+        order_count += (bought > 0).sum(axis=1)
+
+        # Mark to market at the next close and track drawdown
+        value = cash + np.nan_to_num(quantity * closes[t + 1][held]).sum(axis=1)
+        peak = np.maximum(peak, value)
+        max_drawdown = np.maximum(max_drawdown, (1 - value / peak) * 100)
+
+    return value, max_drawdown, order_count
+
+def sweep(closes, symbols, lookbacks, thresholds, top_ns, **kwargs):
+    """Backtest the full grid of parameters and return results sorted by final value."""
+    import pandas as pd
+    grid = np.array(list(itertools.product(lookbacks, thresholds, top_ns)), dtype=np.float64)
+    final_value, max_drawdown, order_count = simulate(
+        closes, step_sizes(symbols), symbols.index(FALLBACK_SYMBOL),
+        grid[:, 0].astype(int), grid[:, 1], grid[:, 2].astype(int), **kwargs
+    )
+    initial_usdt = kwargs.get('initial_usdt', INITIAL_USDT)
+    results = pd.DataFrame({
+        'lookback': grid[:, 0].astype(int),
+        'threshold': grid[:, 1],
+        'top_n': grid[:, 2].astype(int),
+        'final_value': final_value,
+        'total_return_percent': (final_value / initial_usdt - 1) * 100,
+        'max_drawdown_percent': max_drawdown,
+        'orders': order_count,
+    })
+    return results.sort_values('final_value', ascending=False)
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == 'download':
+        from clients import client
+        import top_gainers
+        symbols = [item['symbol'] for item in top_gainers.get_top_200_symbols_with_data()]
+        print(f"Downloading daily klines since {sys.argv[2]} for {len(symbols)} symbols...")
+        download_history(client, symbols + [FALLBACK_SYMBOL], date_to_ms(sys.argv[2]))
+        return
+
+    start_ms = date_to_ms(sys.argv[1]) if len(sys.argv) > 1 else 0
+    end_ms = date_to_ms(sys.argv[2]) if len(sys.argv) > 2 else None
+    times, symbols, closes = load_history(start_ms, end_ms)
+    if FALLBACK_SYMBOL not in symbols:
+        print(f"Error: no {FALLBACK_SYMBOL} history in the kline store. Run 'python backtest.py download <date>' first.")
+        return
+    print(f"Backtesting {len(symbols)} symbols over {len(times)} days...")
+    results = sweep(closes, symbols, lookbacks=[3, 5, 7, 10, 14], thresholds=[10, 20, 30, 40, 50], top_ns=[1, 3, 5, 10])
+    print(results.head(20).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
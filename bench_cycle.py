@@ -0,0 +1,78 @@
+"""
+End-to-end benchmark of one full bot cycle (sell all, scan, buy) against the
+local fake exchange, with injected network latency and optional partial fills.
+Reports wall-clock time per cycle and the REST calls made, as seen by both
+the client and the server.
+
+Usage: python bench_cycle.py [cycles] [latency_ms] [partial_fill_rate]
+With TRADING_MODE=paper, orders fill against the fake order book into a
+virtual ledger and the exchange balances stay untouched.
+"""
+import os
+import sys
+import time
+import tempfile
+import contextlib
+from fake_exchange import FakeExchange
+
+def main():
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 50
+    partial_fill_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0.2
+
+    exchange = FakeExchange(latency=latency_ms / 1000, partial_fill_rate=partial_fill_rate)
+    http_url, ws_url = exchange.start(port=18800, ws_port=18801)
+    tmp_dir = tempfile.mkdtemp()
+    # Must be set before the bot modules read their configuration
+    os.environ.update({
+        'BINANCE_API_URL': http_url,
+        'COINGECKO_URL': f"{http_url}/coingecko",
+        'TELEGRAM_API_URL': f"{http_url}/telegram",
+        'MARKET_STREAM_URL': ws_url,
+        'USER_STREAM_URL': f"{ws_url}/ws",
+        'BINANCE_API_KEY': 'bench', 'BINANCE_API_SECRET': 'bench',
+        'TELEGRAM_BOT_TOKEN': 'bench', 'TELEGRAM_CHAT_ID': 'bench',
+        'KLINE_STORE_PATH': os.path.join(tmp_dir, 'klines.db'),
+        'SYMBOL_FILTERS_PATH': os.path.join(tmp_dir, 'symbol_filters.json'),
+        'UNIVERSE_PATH': os.path.join(tmp_dir, 'universe.json'),
+        'PAPER_LEDGER_PATH': os.path.join(tmp_dir, 'paper_ledger.json'),
+        'JOURNAL_PATH': os.path.join(tmp_dir, 'journal.db'),
+    })
+    import bot
+    import rate_limit
+    import metrics
+    import paper
+    import user_stream
+    from clients import client
+
+    print(f"{cycles} cycles, {latency_ms:.0f} ms latency, {partial_fill_rate:.0%} partial fills")
+    print("=" * 60)
+    durations = []
+    if user_stream.ACCOUNT_DATA_MODE == 'stream' and not paper.is_enabled():
+        user_stream.start(client)
+    if bot.top_gainers.MARKET_DATA_MODE == 'stream':
+        bot.top_gainers.start_streaming()
+    try:
+        for cycle in range(cycles):
+            exchange.request_counts.clear()
+            start = time.perf_counter()
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                bot.main()
+            durations.append(time.perf_counter() - start)
+            print(f"Cycle {cycle + 1}: {durations[-1]:>8.2f} s{rate_limit.request_counter.total():>8} REST calls")
+            for span in metrics.registry.spans:
+                print(f"  {span['phase']:<14}{span['seconds']:>8.2f} s")
+    finally:
+        bot.top_gainers.stop_streaming()
+        user_stream.stop()
+        exchange.stop()
+
+    print(f"\nBest {min(durations):.2f} s, mean {sum(durations) / len(durations):.2f} s")
+    print("\nServer-side requests in the last cycle:")
+    for endpoint, count in sorted(exchange.request_counts.items(), key=lambda item: -item[1]):
+        print(f"  {endpoint:<36}{count:>6}")
+    balances = paper.broker.balances if paper.is_enabled() else exchange.balances
+    print(f"\nFinal balances: { {asset: round(amount, 6) for asset, amount in balances.items() if amount} }")
+
+if __name__ == "__main__":
+    main()
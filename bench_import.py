@@ -0,0 +1,74 @@
+"""
+Measure cold-start import time of bot.py with `python -X importtime`.
+Reports the total import time of `bot`, the slowest imports, and the cost of
+the heavy dependencies that are now deferred until first use.
+
+Usage: python bench_import.py [runs]
+"""
+import os
+import sys
+import subprocess
+
+# Imported eagerly by every module before the shared lazy client
+HEAVY_MODULES = ['binance.client', 'pandas', 'numpy', 'websockets', 'requests']
+
+def import_times(statement):
+    """Run a statement under -X importtime and return {module: cumulative microseconds}."""
+    env = dict(os.environ)
+    # bot.py exits early without these; values are never used for a request
+    for key in ['BINANCE_API_KEY', 'BINANCE_API_SECRET', 'TELEGRAM_BOT_TOKEN', 'TELEGRAM_CHAT_ID']:
+        env.setdefault(key, 'x')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # Keep the indentation, which marks nested imports; drop the separator space
+        times[name[1:]] = int(cumulative_us)
+    return times
+
+def direct_children(times, parent):
+    """Return the modules imported directly by a top-level module, in import order."""
+    children = []
+    for name, us in times.items():
+        if name == parent:
+            return children
+        if not name.startswith(' '):
+            children = []  # Subtree of another top-level module
+        elif not name.startswith('   '):
+            children.append((name.strip(), us))
+    return children
+
+def best_of(runs, statement):
+    samples = [import_times(statement) for _ in range(runs)]
+    return min(samples, key=lambda times: sum(v for k, v in times.items() if not k.startswith(' ')))
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    times = best_of(runs, 'import bot')
+    loaded = {name.strip() for name in times}
+
+    print(f"import bot: {times['bot'] / 1000:.1f} ms (best of {runs})")
+    print("=" * 60)
+    print("Slowest imports made by bot:")
+    for name, us in sorted(direct_children(times, 'bot'), key=lambda item: -item[1])[:10]:
+        print(f"  {name:<30}{us / 1000:>10.1f} ms")
+
+    print("\nHeavy dependencies deferred until first use:")
+    deferred_total = 0
+    for module in HEAVY_MODULES:
+        if module in loaded:
+            print(f"  {module:<30}{'still imported eagerly':>24}")
+            continue
+        cost = best_of(runs, f'import {module}').get(module, 0)
+        deferred_total += cost
+        print(f"  {module:<30}{cost / 1000:>10.1f} ms")
+    print(f"\nEager import of those dependencies would add ~{deferred_total / 1000:.0f} ms "
+          f"(they overlap, so this is an upper bound), plus one Client ping per module.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark the concurrent kline fetcher against the original serial loop.
+Uses a mocked client with a fixed per-request latency, so no network is needed.
+
+Usage: python bench_klines.py [num_symbols] [latency_ms]
+"""
+import sys
+import time
+import kline_fetcher
+
+class MockClient:
+    """Stand-in for binance.client.Client returning 7 daily klines after a delay."""
+    def __init__(self, latency):
+        self.latency = latency
+
+    def get_historical_klines(self, symbol, interval, start_str):
+        # Two round trips per call, as in python-binance
+        time.sleep(2 * self.latency)
+        return [[i, '1', '1', '1', str(1 + i * 0.1), '1'] for i in range(7)]
+
+def run_serial(client, symbols):
+    results = []
+    for symbol in symbols:
+        try:
+            klines = client.get_historical_klines(symbol, '1d', "7 day ago UTC")
+            results.append({'symbol': symbol, 'klines': klines, 'error': None})
+        except Exception as e:
+            results.append({'symbol': symbol, 'klines': None, 'error': e})
+    return results
+
+def run_concurrent(client, symbols):
+    return kline_fetcher.fetch_klines(client, symbols, '1d', "7 day ago UTC")
+
+def main():
+    num_symbols = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 50) / 1000
+    client = MockClient(latency)
+    symbols = [f"SYM{i}USDT" for i in range(num_symbols)]
+
+    print(f"Fetching klines for {num_symbols} symbols at {latency * 1000:.0f} ms per request")
+    print("=" * 60)
+    timings = {}
+    for name, runner in [('serial', run_serial), ('concurrent', run_concurrent)]:
+        start = time.perf_counter()
+        results = runner(client, symbols)
+        timings[name] = time.perf_counter() - start
+        assert [r['symbol'] for r in results] == symbols
+        print(f"{name:<12}{timings[name]:>10.2f} s")
+    print(f"Speedup: {timings['serial'] / timings['concurrent']:.1f}x "
+          f"with {kline_fetcher.KLINE_FETCH_WORKERS} workers")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Microbenchmark the vectorized momentum scoring against the original
+list-of-dicts + DataFrame scoring on synthetic klines. Both score the weekly
+change alone (factors=[]); "score only" times the matrix scoring without
+parsing the kline strings.
+
+Usage: python bench_momentum.py [repeats]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+import momentum
+
+def make_klines(num_symbols, days, seed=0):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.cumprod(1 + rng.normal(0.03, 0.08, (num_symbols, days)), axis=1)
+    volumes = rng.uniform(1e5, 1e7, (num_symbols, days))
+    kline_lists = [
+        [[d, c, c, c, c, '0', d, v, 0, '0', '0'] for d, (c, v) in enumerate(zip(closes[i], volumes[i]))]
+        for i in range(num_symbols)
+    ]
+    change_24h = rng.normal(0, 5, num_symbols)
+    return kline_lists, change_24h
+
+def score_scalar(kline_lists, change_24h):
+    crypto_data = []
+    for i, klines in enumerate(kline_lists):
+        if len(klines) < 7:
+            continue
+        close_prices = [float(kline[4]) for kline in klines]
+        week_change = ((close_prices[-1] - close_prices[0]) / close_prices[0]) * 100
+        crypto_data.append({
+            'symbol': i,
+            'week_price_change_percent': week_change,
+            '24h_price_change_percent': float(change_24h[i]),
+        })
+    df = pd.DataFrame(crypto_data)
+    df_filtered = df[(df['24h_price_change_percent'] > 0) & (df['week_price_change_percent'] > 30)]
+    return df_filtered.sort_values('week_price_change_percent', ascending=False)['symbol'].tolist()
+
+def score_vectorized(kline_lists, change_24h):
+    closes, volumes = momentum.build_matrices(kline_lists, 7)
+    selected, _ = momentum.score(closes, volumes, change_24h, factors=[])
+    return selected.tolist()
+
+def score_matrix_only(closes, volumes, change_24h):
+    selected, _ = momentum.score(closes, volumes, change_24h, factors=[])
+    return selected.tolist()
+
+def best_of(repeats, func, *args):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"{'Symbols':<10}{'scalar':>12}{'vectorized':>14}{'score only':>14}")
+    print("=" * 50)
+    for num_symbols in (200, 2000):
+        kline_lists, change_24h = make_klines(num_symbols, 7)
+        closes, volumes = momentum.build_matrices(kline_lists, 7)
+        scalar_time, scalar_result = best_of(repeats, score_scalar, kline_lists, change_24h)
+        vector_time, vector_result = best_of(repeats, score_vectorized, kline_lists, change_24h)
+        matrix_time, _ = best_of(repeats, score_matrix_only, closes, volumes, change_24h)
+        assert scalar_result == vector_result
+        print(f"{num_symbols:<10}{scalar_time * 1000:>10.2f}ms{vector_time * 1000:>12.2f}ms{matrix_time * 1000:>12.3f}ms")
+
+if __name__ == "__main__":
+    main()
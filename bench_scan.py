@@ -0,0 +1,80 @@
+"""
+Benchmark the per-tick cost of a 1-minute momentum scan over a large universe:
+the candle rings (one O(1) update per symbol, then score) against rebuilding
+the window matrices from kline lists on every tick, as the scan did before
+the rings.
+
+Usage: python bench_scan.py [symbols] [lookback] [ticks]
+"""
+import sys
+import time
+import numpy as np
+import candles
+import momentum
+
+MINUTE_MS = 60_000
+
+def make_history(num_symbols, candles_count, seed=0):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.cumprod(1 + rng.normal(0, 0.002, (num_symbols, candles_count)), axis=1)
+    volumes = rng.uniform(1e3, 1e5, (num_symbols, candles_count))
+    return closes, volumes
+
+def kline(open_time, close, volume):
+    return [open_time, close, close, close, close, '0', open_time + MINUTE_MS - 1, volume, 0, '0', '0']
+
+def main():
+    num_symbols = int(sys.argv[1]) if len(sys.argv) > 1 else 1200
+    lookback = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    ticks = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    symbols = [f"S{i:04d}USDT" for i in range(num_symbols)]
+    closes, volumes = make_history(num_symbols, lookback + ticks)
+    change_24h = np.random.default_rng(1).normal(0, 5, num_symbols)
+
+    # Rings and kline lists both start from the same full window
+    ring = candles.CandleRing('1m', lookback)
+    kline_lists = []
+    for row, symbol in enumerate(symbols):
+        klines = [kline(t * MINUTE_MS, closes[row, t], volumes[row, t]) for t in range(lookback)]
+        ring.extend(symbol, klines)
+        kline_lists.append(klines)
+
+    print(f"{num_symbols} symbols, {lookback} x 1m lookback, {ticks} ticks")
+    print("=" * 60)
+    ring_bytes = ring.closes.nbytes + ring.volumes.nbytes + ring.open_times.nbytes
+    ring_times, rebuild_times = [], []
+    for t in range(lookback, lookback + ticks):
+        # Ring: one O(1) update per symbol as the new candle arrives, then score the window
+        start = time.perf_counter()
+        for row, symbol in enumerate(symbols):
+            ring.update(symbol, t * MINUTE_MS, closes[row, t], volumes[row, t])
+        window_closes, window_volumes = ring.window(symbols)
+        ring_selected, _ = momentum.score(window_closes, window_volumes, change_24h, 0.5)
+        ring_times.append(time.perf_counter() - start)
+
+        # Rebuild: append the candle, trim the list, and parse every window again
+        start = time.perf_counter()
+        for row, klines in enumerate(kline_lists):
+            klines.append(kline(t * MINUTE_MS, closes[row, t], volumes[row, t]))
+            del klines[:-lookback]
+        rebuilt_closes, rebuilt_volumes = momentum.build_matrices(kline_lists, lookback)
+        rebuild_selected, _ = momentum.score(rebuilt_closes, rebuilt_volumes, change_24h, 0.5)
+        rebuild_times.append(time.perf_counter() - start)
+        assert ring_selected.tolist() == rebuild_selected.tolist()
+
+    # O(1) read of the lookback return alone, without building the window
+    change_times = []
+    for _ in range(ticks):
+        start = time.perf_counter()
+        ring.change(symbols)
+        change_times.append(time.perf_counter() - start)
+
+    print(f"{'':<24}{'median':>12}{'best':>12}")
+    print(f"{'ring update + score':<24}{np.median(ring_times) * 1000:>10.2f}ms{min(ring_times) * 1000:>10.2f}ms")
+    print(f"{'rebuild + score':<24}{np.median(rebuild_times) * 1000:>10.2f}ms{min(rebuild_times) * 1000:>10.2f}ms")
+    print(f"{'ring change() only':<24}{np.median(change_times) * 1000:>10.2f}ms{min(change_times) * 1000:>10.2f}ms")
+    after_bytes = ring.closes.nbytes + ring.volumes.nbytes + ring.open_times.nbytes
+    print(f"\nRing arrays: {ring_bytes / 1e6:.2f} MB before the ticks, {after_bytes / 1e6:.2f} MB after")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Scaling benchmark of the multi-process sweep runner at 1, 2, 4 and 8 workers
+on synthetic price history.
+
+Usage: python bench_sweep.py [days] [symbols]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import sweep
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    num_symbols = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    rng = np.random.default_rng(0)
+    closes = 100 * np.cumprod(1 + rng.normal(0.001, 0.05, (days, num_symbols)), axis=0)
+    steps = np.full(num_symbols, 0.001)
+    lookbacks = np.arange(2, 22)
+    thresholds = np.arange(0, 100, 5)
+    top_ns = np.arange(1, 11)
+    combos = len(lookbacks) * len(thresholds) * len(top_ns)
+
+    print(f"{combos} combinations, {days} days, {num_symbols} symbols, {os.cpu_count()} CPUs")
+    print("=" * 50)
+    baseline = None
+    for workers in (1, 2, 4, 8):
+        with tempfile.TemporaryDirectory() as output_dir:
+            start = time.perf_counter()
+            rows = sweep.run_sweep(closes, steps, 0, lookbacks, thresholds, top_ns, output_dir, workers=workers)
+            elapsed = time.perf_counter() - start
+        assert rows == combos
+        baseline = baseline or elapsed
+        print(f"{workers} workers{elapsed:>12.2f} s{baseline / elapsed:>10.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1,133 +1,114 @@
 import os
-import io
 import sys
-import time
-import math
-import requests
-from binance.client import Client
-from dotenv import load_dotenv
+from datetime import datetime, timezone
+import config
+from clients import client
+import logs
+import journal
+import metrics
+import notifier
+import symbol_filters
+import orders
+import paper
+import price_snapshot
+import quantize
+import rate_limit
+import scheduler
 import top_gainers
 import sell_all
 import get_balance
+import user_stream
 
-# Load API keys from .env file
-load_dotenv('.env')
-
-API_KEY = os.getenv('BINANCE_API_KEY')
-API_SECRET = os.getenv('BINANCE_API_SECRET')
 BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
-if not API_KEY or not API_SECRET or not BOT_TOKEN or not CHAT_ID:
-    print("Error: One or more environment variables are missing.")
+# Paper trading only reads public market data, so it runs without API keys
+if (not paper.is_enabled() and (not config.API_KEY or not config.API_SECRET)) or not BOT_TOKEN or not CHAT_ID:
+    # Logging is not set up yet, so this goes to stderr, which run_bot.sh keeps
+    print("Error: One or more environment variables are missing.", file=sys.stderr)
     sys.exit(1)
 
-# Initialize Binance client
-client = Client(API_KEY, API_SECRET)
-
-# Define DualOutput class for simultaneous console and buffer output
-class DualOutput:
-    def __init__(self):
-        self.buffer = io.StringIO()
-        self.console = sys.__stdout__
-
-    def write(self, text):
-        self.buffer.write(text)
-        self.console.write(text)
-
-    def flush(self):
-        self.buffer.flush()
-        self.console.flush()
-
-    def getvalue(self):
-        return self.buffer.getvalue()
+# Smallest per-token amount worth re-investing when buys leave USDT behind
+MIN_RECONCILE_USDT = 5
+# USDT amounts are sent to the exchange in whole cents
+QUOTE_STEP = 0.01
 
 def send_telegram_message(message):
-    """Send a message via Telegram bot."""
-    url = f'https://api.telegram.org/bot{BOT_TOKEN}/sendMessage'
-    try:
-        payload = {
-            'chat_id': CHAT_ID,
-            'text': message,
-            'parse_mode': 'Markdown'
-        }
-        response = requests.post(url, json=payload, timeout=10)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"Error sending Telegram message: {e}")
+    """Queue a message for the Telegram bot; it is delivered in the background."""
+    notifier.telegram.send(message)
 
 def buy_token(symbol, usdt_amount):
-    """Buy a token using a specified amount of USDT."""
+    """
+    Buy a token with a market order spending a specified amount of USDT.
+    Returns the final order and its submit-to-fill latency, or (None, None).
+    """
     try:
-        # Get the current price
-        price_info = client.get_symbol_ticker(symbol=symbol)
-        current_price = float(price_info['price'])
-
-        # Calculate quantity to buy
-        quantity = usdt_amount / current_price
-
-        # Adjust quantity to lot size
-        min_qty, step_size = get_lot_size(symbol)
-        if min_qty is None or step_size is None:
+        filters = symbol_filters.get_symbol_filters(client, symbol)
+        if filters is None or filters['step_size'] is None:
             print(f"Cannot fetch lot size for {symbol}. Skipping...")
-            return
-
-        # Adjust quantity to comply with step size
-        quantity = adjust_to_step_size(quantity, step_size)
-
-        if quantity < min_qty:
-            print(f"Quantity {quantity} is below the minimum allowed {min_qty} for {symbol}. Skipping...")
-            return
+            return None, None
+        if filters['status'] != 'TRADING':
+            print(f"{symbol} is not currently trading. Skipping...")
+            return None, None
 
-        # Format quantity to correct precision
-        step_size_str = "{:f}".format(step_size).rstrip('0')
-        decimals = len(step_size_str.split('.')[-1]) if '.' in step_size_str else 0
-        quantity_str = f"{{:.{decimals}f}}".format(quantity)
+        # Get the current price
+        current_price = price_snapshot.get_price(client, symbol)
+        if current_price is None:
+            print(f"Price not found for {symbol}. Skipping...")
+            return None, None
 
-        # Remove any trailing zeros and unnecessary decimal points
-        quantity_str = quantity_str.rstrip('0').rstrip('.')
+        # Check the order against LOT_SIZE and MIN_NOTIONAL before sending it
+        reason = quantize.check_order(filters, usdt_amount / current_price, current_price)
+        if reason:
+            print(f"Order for {symbol} rejected before sending: {reason}. Skipping...")
+            return None, None
 
-        print(f"Placing order for {symbol} with quantity {quantity_str}...")
+        # Spend an exact USDT amount, rounded down to the cent, and let the exchange size the quantity
+        quote_qty = quantize.format_quantity(usdt_amount, QUOTE_STEP)
+        print(f"Placing order for {symbol} spending {quote_qty} USDT...")
 
         # Place a market buy order
-        order = client.create_order(
+        order, latency = orders.execute_order(
+            client,
             symbol=symbol,
             side='BUY',
             type='MARKET',
-            quantity=quantity_str
+            quoteOrderQty=quote_qty,
+            expected_price=current_price
         )
         print(f"Buy order successful for {symbol}! Order details: {order}")
+        return order, latency
     except Exception as e:
+        symbol_filters.handle_order_error(e)
         print(f"Error buying {symbol}: {e}")
+        return None, None
 
-def get_lot_size(symbol):
-    """Get minimum quantity and step size for a symbol."""
-    try:
-        exchange_info = client.get_symbol_info(symbol)
-        if exchange_info is None:
-            print(f"Symbol info not found for {symbol}")
-            return None, None
-        for f in exchange_info['filters']:
-            if f['filterType'] == 'LOT_SIZE':
-                min_qty = float(f['minQty'])
-                step_size = float(f['stepSize'])
-                return min_qty, step_size
-    except Exception as e:
-        print(f"Error fetching lot size for {symbol}: {e}")
-    return None, None
+def buy_tokens(symbols, usdt_balance):
+    """Split a USDT balance equally across symbols and buy them in parallel. Returns filled orders."""
+    # Distribute USDT among the tokens
+    usdt_per_token = usdt_balance / len(symbols) - 0.1  # Subtract estimated fees
+    if usdt_per_token <= 0:
+        print("Insufficient USDT to buy tokens.")
+        return []
 
-def adjust_to_step_size(quantity, step_size):
-    """Adjust quantity to comply with step size."""
-    precision = int(round(-math.log(step_size, 10), 0))
-    return round(quantity, precision)
+    for symbol in symbols:
+        print(f"*******Buying {symbol} with {usdt_per_token:.2f} USDT...")
+    results = orders.run_concurrently(lambda symbol: buy_token(symbol, usdt_per_token), symbols)
+
+    filled_orders = []
+    for symbol, (order, latency) in zip(symbols, results):
+        if order is None:
+            continue
+        print(f"{symbol}: {order['status']} in {latency * 1000:.0f} ms from submit")
+        if order['status'] == 'FILLED':
+            filled_orders.append(order)
+    return filled_orders
 
 def get_usdt_balance():
     """Helper function to get USDT balance."""
-    account_info = client.get_account()
-    balances = account_info['balances']
-    for balance in balances:
+    for balance in user_stream.get_balances(client):
         if balance['asset'] == 'USDT':
-            return float(balance['free'])
+            return balance['free']
     return 0.0
 
 def get_total_usdt_value(balances):
@@ -150,10 +131,35 @@ def generate_summary(initial_balances, initial_usdt_value, top_symbols, final_ba
         format_balances(final_balances),
         f"\n*Final Total Portfolio Value:* `{final_usdt_value:.2f} USDT`",
         "",
+        *format_journal_stats(),
         "Happy Trading! 📈"
     ]
+    if paper.is_enabled():
+        report_lines.insert(0, "📝 *Paper trading: no real orders were sent*")
     return '\n'.join(report_lines)
 
+def format_journal_stats():
+    """Summary lines with the all-time totals from the trade journal, or none if it has no history."""
+    try:
+        # The cycle's orders and valuations are written in the background; wait for them
+        journal.trade_journal.flush()
+        stats = journal.trade_journal.cumulative()
+    except Exception as e:
+        print(f"Error reading the trade journal: {e}")
+        return []
+    if stats is None:
+        return []
+    since = datetime.fromtimestamp(stats['since_ms'] / 1000, timezone.utc).strftime('%Y-%m-%d')
+    lines = [f"*Since {since}:* {stats['cycles']} cycles, {stats['orders']} orders"]
+    if stats['first_value']:
+        total_return = (stats['latest_value'] / stats['first_value'] - 1) * 100
+        lines.append(f"- Return: `{total_return:+.2f}%` ({stats['first_value']:.2f} → {stats['latest_value']:.2f} USDT)")
+    lines.append(f"- Fees: `{stats['fees']:.2f} USDT`")
+    lines.append(f"- Max drawdown: `{stats['max_drawdown']:.2f}%`")
+    if stats['mean_slippage_bps'] is not None:
+        lines.append(f"- Mean slippage: `{stats['mean_slippage_bps']:.1f} bps`")
+    return lines + [""]
+
 def format_balances(balances):
     """Format balances for display."""
     lines = []
@@ -165,116 +171,127 @@ def format_balances(balances):
     return '\n'.join(lines)
 
 def main():
-    # Step 0: Get initial balances before selling
-    print("Fetching balances before running the script...")
-    initial_balances = get_balance.get_positive_balances(return_balances=True)
-    initial_usdt_value = get_total_usdt_value(initial_balances)
-    print(f"Initial Total Portfolio Value: {initial_usdt_value:.2f} USDT")
-
-    # Step 1: Sell all tokens except USDT
-    print("\nStep 1: Selling all tokens...")
-    sell_all.main()
-    time.sleep(10)  # Wait for sell orders to complete
+    rate_limit.request_counter.reset()
+    metrics.registry.reset_spans()
+    journal.trade_journal.start_cycle()
 
-    # Step 2: Display total USDT balance after selling
-    usdt_balance = get_usdt_balance()
-    print(f"\nTotal USDT balance after selling: {usdt_balance:.2f} USDT")
+    # Step 0: Get initial balances before selling
+    with metrics.registry.span('balances'):
+        print("Fetching balances before running the script...")
+        initial_balances = get_balance.get_positive_balances(return_balances=True)
+        initial_usdt_value = get_total_usdt_value(initial_balances)
+        print(f"Initial Total Portfolio Value: {initial_usdt_value:.2f} USDT")
+        journal.trade_journal.record_valuation('start', initial_usdt_value, initial_balances)
+
+    with metrics.registry.span('liquidation'):
+        # Step 1: Sell all tokens except USDT
+        print("\nStep 1: Selling all tokens...")
+        sell_all.main()  # Returns once sell orders are confirmed filled
+
+        # Step 2: Display total USDT balance after selling
+        usdt_balance = get_usdt_balance()
+        print(f"\nTotal USDT balance after selling: {usdt_balance:.2f} USDT")
 
     # Step 3: Fetch top gainers
-    print("\nStep 3: Fetching top gainers...")
-    results = top_gainers.get_top_gainers()
-    top_gainers.display_results(results)
-    symbols = results['symbol'].tolist()
+    with metrics.registry.span('scan'):
+        print("\nStep 3: Fetching top gainers...")
+        results = top_gainers.get_top_gainers()
+        top_gainers.display_results(results)
+        symbols = results['symbol'].tolist()
 
-    # Limit to top 5 gainers
-    top_symbols = symbols[:5]
+        # Limit to top 5 gainers
+        top_symbols = symbols[:5]
 
-    # If less than 5 top gainers, fill the rest with 'BTCUSDT'
-    while len(top_symbols) < 5:
-        top_symbols.append('BTCUSDT')
+        # If less than 5 top gainers, fill the rest with 'BTCUSDT'
+        while len(top_symbols) < 5:
+            top_symbols.append('BTCUSDT')
 
-    print(f"Top 5 gainers (including BTC if less than 5): {top_symbols}")
+        print(f"Top 5 gainers (including BTC if less than 5): {top_symbols}")
 
     # Step 4: Buy top gainers
-    print("\nStep 4: Buying top gainers...")
-    num_tokens = len(top_symbols)
-    for idx, symbol in enumerate(top_symbols):
-        # Re-fetch USDT balance before each purchase
-        usdt_balance = get_usdt_balance()
-        tokens_left = num_tokens - idx
+    with metrics.registry.span('buy'):
+        print("\nStep 4: Buying top gainers...")
         if usdt_balance <= 0:
             print("No USDT available to buy tokens.")
-            break
+        else:
+            filled_orders = buy_tokens(top_symbols, usdt_balance)
 
-        # Distribute remaining USDT among the remaining tokens
-        usdt_per_token = usdt_balance / tokens_left - 0.1  # Subtract estimated fees
+            # Reconcile USDT left over by skipped or rejected orders
+            leftover_usdt = get_usdt_balance()
+            bought_symbols = [order['symbol'] for order in filled_orders]
+            if bought_symbols and leftover_usdt / len(bought_symbols) >= MIN_RECONCILE_USDT:
+                print(f"\nReconciling {leftover_usdt:.2f} USDT left over across {len(bought_symbols)} tokens...")
+                buy_tokens(bought_symbols, leftover_usdt)
 
-        if usdt_per_token <= 0:
-            print(f"Insufficient USDT to buy {symbol}. Skipping...")
-            continue
+    # Step 5: Display updated balances
+    with metrics.registry.span('report'):
+        print("\nStep 5: Displaying updated account balances...")
+        final_balances = get_balance.get_positive_balances(return_balances=True)
+        final_usdt_value = get_total_usdt_value(final_balances)
+        print(f"Final Total Portfolio Value: {final_usdt_value:.2f} USDT")
+        journal.trade_journal.record_valuation('end', final_usdt_value, final_balances)
+        print(f"\nREST calls this cycle: {rate_limit.request_counter.total()}")
+        print(rate_limit.request_counter.report())
 
-        print(f"*******Buying {symbol} with {usdt_per_token:.2f} USDT...")
-        buy_token(symbol, usdt_per_token)
-        time.sleep(5)  # Delay to avoid rate limits
+        # Generate the summary
+        summary = generate_summary(initial_balances, initial_usdt_value, top_symbols, final_balances, final_usdt_value)
 
-    # Step 5: Display updated balances
-    print("\nStep 5: Displaying updated account balances...")
-    final_balances = get_balance.get_positive_balances(return_balances=True)
-    final_usdt_value = get_total_usdt_value(final_balances)
-    print(f"Final Total Portfolio Value: {final_usdt_value:.2f} USDT")
-    
-    # Generate the summary
-    summary = generate_summary(initial_balances, initial_usdt_value, top_symbols, final_balances, final_usdt_value)
+    print("Cycle phases: " + ", ".join(f"{span['phase']} {span['seconds']:.2f} s" for span in metrics.registry.spans))
 
     # Return data for the summary
     return initial_balances, initial_usdt_value, top_symbols, final_balances, final_usdt_value, summary
 
-if __name__ == "__main__":
-    
-    while True:
-        # Create an instance of DualOutput
-        dual_output = DualOutput()
-        # Redirect sys.stdout to dual_output
-        sys.stdout = dual_output
-
-        try:
+def run_cycle():
+    """Run one bot cycle, then send the errors it logged and the summary to Telegram."""
+    logs.setup()
+
+    try:
+        with logs.capture_stdout():
             # Execute your main function and get summary data
             initial_balances, initial_usdt_value, top_symbols, final_balances, final_usdt_value, summary = main()
-        except requests.exceptions.ConnectionError as ce:
-            print(f"ConnectionError: {ce}. Retrying in 20 minutes.")
-            sys.stdout = sys.__stdout__
-            time.sleep(20 * 60)  # Wait for 20 minutes before retrying
-            continue
-        except requests.exceptions.Timeout as te:
-            print(f"TimeoutError: {te}. Retrying in 1 minute.")
-            sys.stdout = sys.__stdout__
-            time.sleep(1 * 60)  # Wait for 1 minute before retrying
-            continue
-        except Exception as e:
-            print(f"Unexpected error: {e}. Retrying in 1 minute.")
-            sys.stdout = sys.__stdout__
-            time.sleep(1 * 60)  # Wait for 1 minute before retrying
-            continue
-        finally:
-            # Restore standard stdout
-            sys.stdout = sys.__stdout__
-
-        # Get captured output
-        captured_logs = dual_output.getvalue()
-
-        # Filter lines that look like errors
-        error_lines = []
-        for line in captured_logs.splitlines():
-            if any(keyword in line for keyword in ["Error", "Exception", "Failed","error", "exception", "failed"]):
-                error_lines.append(line)
-        
-        # Send only errors (if any)
-        if error_lines:
-            error_text = "\n".join(error_lines)
-            send_telegram_message(f"```\n{error_text}\n```")
-
-        # Then send the summary
-        send_telegram_message(summary)
-
-        # Exit after successful execution
-        break
\ No newline at end of file
+    finally:
+        metrics.write_jsonl()
+
+    # Send only errors (if any): everything logged since the last alert, including
+    # stream reconnects, startup warnings and failed attempts from before this cycle
+    logs.flush()
+    error_lines = logs.error_buffer.drain()
+    if error_lines:
+        error_text = "\n".join(error_lines)
+        send_telegram_message(f"```\n{error_text}\n```")
+
+    # Then send the summary
+    send_telegram_message(summary)
+
+def report_give_up(attempts):
+    """Alert on Telegram when every retry of a cycle failed, with the errors logged along the way."""
+    logs.flush()
+    error_lines = logs.error_buffer.drain()
+    message = (f"*Bot cycle failed after {attempts} attempts.* The portfolio may have been left in USDT "
+               f"if liquidation finished; check the account before the next run.")
+    if error_lines:
+        error_text = "\n".join(error_lines)
+        message += f"\n```\n{error_text}\n```"
+    send_telegram_message(message)
+
+if __name__ == "__main__":
+    logs.setup()
+    sys.stdout = logs.PrintToLog()
+    if user_stream.ACCOUNT_DATA_MODE == 'stream' and not paper.is_enabled():
+        # Balances and fills come from the user-data stream instead of polling
+        user_stream.start(client)
+    try:
+        if '--daemon' in sys.argv:
+            # Stay resident: clients, caches and connection pools are reused across cycles
+            metrics.start_server()
+            if top_gainers.MARKET_DATA_MODE == 'stream':
+                top_gainers.start_streaming()
+            try:
+                scheduler.run_forever(run_cycle, scheduler.Schedule(), on_give_up=report_give_up)
+            finally:
+                top_gainers.stop_streaming()
+        else:
+            # Run one cycle, retrying with backoff on failure
+            scheduler.run_with_retries(run_cycle, on_give_up=report_give_up)
+    finally:
+        user_stream.stop()
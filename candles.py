@@ -0,0 +1,103 @@
+"""
+Fixed-size candle ring buffers for momentum scanning.
+
+Each interval keeps a (symbols x lookback) NumPy array per field. Each row is
+one symbol's ring, and heads[row] marks its newest candle. A new candle
+overwrites the oldest slot, and an update to the open candle overwrites the
+newest one. Memory stays flat however long the bot runs, and the return over
+the lookback is read from two slots per symbol instead of recomputed from the
+window. The lookback counts candles, so a symbol with missing candles spans a
+longer time.
+"""
+import threading
+import numpy as np
+
+class CandleRing:
+    """Last `lookback` closes and quote volumes of every symbol for one interval."""
+    def __init__(self, interval, lookback):
+        self.interval = interval
+        self.lookback = lookback
+        self.rows = {}
+        self.open_times = np.zeros((0, lookback), dtype=np.int64)
+        self.closes = np.zeros((0, lookback))
+        self.volumes = np.zeros((0, lookback))
+        self.heads = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.lock = threading.Lock()
+        self._grow(16)
+
+    def _grow(self, extra):
+        """Add room for `extra` more symbols."""
+        self.open_times = np.vstack([self.open_times, np.zeros((extra, self.lookback), dtype=np.int64)])
+        self.closes = np.vstack([self.closes, np.zeros((extra, self.lookback))])
+        self.volumes = np.vstack([self.volumes, np.zeros((extra, self.lookback))])
+        self.heads = np.concatenate([self.heads, np.full(extra, self.lookback - 1, dtype=np.int64)])
+        self.counts = np.concatenate([self.counts, np.zeros(extra, dtype=np.int64)])
+
+    def _row(self, symbol):
+        """Row of a symbol, adding one on first sight; the arrays double when full."""
+        row = self.rows.get(symbol)
+        if row is None:
+            row = len(self.rows)
+            if row == len(self.heads):
+                self._grow(row)
+            self.rows[symbol] = row
+        return row
+
+    def update(self, symbol, open_time, close, quote_volume):
+        """Add a new candle or overwrite the open one, in O(1). Older candles are ignored."""
+        with self.lock:
+            row = self._row(symbol)
+            head = self.heads[row]
+            if self.counts[row] and open_time == self.open_times[row, head]:
+                pass  # Still the open candle: overwrite it in place
+            elif not self.counts[row] or open_time > self.open_times[row, head]:
+                head = (head + 1) % self.lookback
+                self.heads[row] = head
+                self.counts[row] = min(self.counts[row] + 1, self.lookback)
+            else:
+                return
+            self.open_times[row, head] = open_time
+            self.closes[row, head] = close
+            self.volumes[row, head] = quote_volume
+
+    def extend(self, symbol, klines):
+        """Apply REST-format klines, oldest first, skipping those already held. Returns how many were applied."""
+        with self.lock:
+            row = self.rows.get(symbol)
+            last = self.open_times[row, self.heads[row]] if row is not None and self.counts[row] else -1
+        # Only the tail at or after the newest held candle is new
+        start = len(klines)
+        while start > 0 and int(klines[start - 1][0]) >= last:
+            start -= 1
+        for kline in klines[start:]:
+            self.update(symbol, int(kline[0]), float(kline[4]), float(kline[7]))
+        return len(klines) - start
+
+    def _indices(self, symbols):
+        rows = np.array([self.rows.get(symbol, -1) for symbol in symbols], dtype=np.int64)
+        known = rows >= 0
+        full = np.zeros(len(rows), dtype=bool)
+        full[known] = self.counts[rows[known]] == self.lookback
+        return np.where(known, rows, 0), full
+
+    def change(self, symbols):
+        """Percent change from the oldest to the newest candle of each symbol's window; NaN until the window is full."""
+        with self.lock:
+            rows, full = self._indices(symbols)
+            heads = self.heads[rows]
+            newest = self.closes[rows, heads]
+            oldest = self.closes[rows, (heads + 1) % self.lookback]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(full, (newest - oldest) / oldest * 100, np.nan)
+
+    def window(self, symbols):
+        """(symbols x lookback) closes and quote volumes, oldest first; NaN rows until the window is full."""
+        with self.lock:
+            rows, full = self._indices(symbols)
+            columns = (self.heads[rows, None] + 1 + np.arange(self.lookback)) % self.lookback
+            closes = self.closes[rows[:, None], columns]
+            volumes = self.volumes[rows[:, None], columns]
+        closes[~full] = np.nan
+        volumes[~full] = np.nan
+        return closes, volumes
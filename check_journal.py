@@ -0,0 +1,102 @@
+"""
+Check the trade journal's PnL and fee accounting on hand-written orders:
+round trips are paired with their own buys, so a time range that starts
+after an earlier round trip reports only the later one, the sub-step dust
+left by a coarse step size does not leak into the next round trip, and fees
+paid in BNB are valued at the snapshot price. Exits non-zero on failure.
+
+Usage: python check_journal.py
+"""
+import os
+import sys
+import time
+import tempfile
+import journal
+import symbol_filters
+
+# Step sizes used to tell a sold-out position from one still held, instead of exchangeInfo
+STEP_SIZES = {'SOLUSDT': 0.001, 'OPUSDT': 0.01, 'ADAUSDT': 1.0}
+
+def order(time_ms, symbol, side, quantity, quote, fills=None):
+    """An order in the create_order() response format, as orders.execute_order journals it."""
+    return {
+        'symbol': symbol, 'side': side, 'orderId': time_ms, 'status': 'FILLED', 'transactTime': time_ms,
+        'executedQty': f"{quantity}", 'cummulativeQuoteQty': f"{quote}", 'fills': fills or [],
+    }
+
+def fill(price, quantity, commission, asset):
+    return {'price': f"{price}", 'qty': f"{quantity}", 'commission': f"{commission}", 'commissionAsset': asset}
+
+def close(actual, expected):
+    return actual is not None and abs(actual - expected) < 1e-9
+
+def main():
+    failures = []
+    symbol_filters.index.symbols = {symbol: {'step_size': step} for symbol, step in STEP_SIZES.items()}
+    symbol_filters.index.fetched_at = time.time()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        trade_journal = journal.Journal(os.path.join(tmp, 'journal.db'))
+        # Two round trips, +10 then -10, and a sell of holdings from before the journal
+        for args in [
+            (1000, 'SOLUSDT', 'BUY', 1, 100), (2000, 'SOLUSDT', 'SELL', 1, 110),
+            (3000, 'SOLUSDT', 'BUY', 1, 200), (3500, 'SOLUSDT', 'SELL', 1, 190),
+            (3600, 'OPUSDT', 'SELL', 10, 20),
+        ]:
+            trade_journal.record_order(order(*args))
+        # Two round trips with a 0.1% fee in the base asset on the buy and in USDT on the sell. With a
+        # step of 1 ADA, only whole ADA are sold and the rest is left as dust
+        trade_journal.record_order(order(5000, 'ADAUSDT', 'BUY', 100, 50, [fill(0.5, 100, 0.1, 'ADA')]))
+        trade_journal.record_order(order(6000, 'ADAUSDT', 'SELL', 99, 59.4, [fill(0.6, 99, 0.0594, 'USDT')]))
+        trade_journal.record_order(order(7000, 'ADAUSDT', 'BUY', 20, 20, [fill(1.0, 20, 0.02, 'ADA')]))
+        trade_journal.record_order(order(8000, 'ADAUSDT', 'SELL', 19, 22.8, [fill(1.2, 19, 0.0228, 'USDT')]))
+        trade_journal.record_order(order(9000, 'ADAUSDT', 'BUY', 10, 15, [fill(1.5, 10, 0.01, 'ADA')]))
+        trade_journal.record_order(order(10000, 'ADAUSDT', 'SELL', 9, 14.4, [fill(1.6, 9, 0.0144, 'USDT')]))
+        if not trade_journal.flush():
+            sys.exit("FAIL: journal writes did not finish")
+
+        later = trade_journal.symbol_pnl(3000, 4000)
+        if not close(later['SOLUSDT'][0], -10):
+            failures.append(f"SOLUSDT PnL over the second round trip is {later['SOLUSDT'][0]}, expected -10")
+        first = trade_journal.symbol_pnl(0, 2500)
+        if not close(first['SOLUSDT'][0], 10):
+            failures.append(f"SOLUSDT PnL over the first round trip is {first['SOLUSDT'][0]}, expected +10")
+        overall = trade_journal.symbol_pnl()
+        if not close(overall['SOLUSDT'][0], 0) or not close(overall['SOLUSDT'][1], 300):
+            failures.append(f"SOLUSDT over all time is {overall['SOLUSDT']}, expected (0, 300, 0)")
+        if overall['OPUSDT'][0] is not None:
+            failures.append(f"OPUSDT sold without a journaled buy has PnL {overall['OPUSDT'][0]}, expected None")
+        # Proceeds - the cost of the share of the net 99.9 ADA sold - the sell fee; the buy fee is
+        # already out of the quantity
+        expected = 59.4 - 50 * 99 / 99.9 - 0.0594
+        first_ada = trade_journal.symbol_pnl(0, 6500)['ADAUSDT'][0]
+        if not close(first_ada, expected):
+            failures.append(f"ADAUSDT PnL of the first round trip is {first_ada}, expected {expected}")
+        expected = 22.8 - 20 * 19 / 19.98 - 0.0228
+        second_ada = trade_journal.symbol_pnl(6500, 8500)['ADAUSDT'][0]
+        if not close(second_ada, expected):
+            failures.append(f"ADAUSDT PnL of the second round trip is {second_ada}, expected {expected}")
+        # The second sell left 0.98 ADA (4.9% of the position), still under one step: none of its cost
+        # may leak into the third round trip
+        expected = 14.4 - 15 * 9 / 9.99 - 0.0144
+        third_ada = trade_journal.symbol_pnl(8500, 11000)['ADAUSDT'][0]
+        if not close(third_ada, expected):
+            failures.append(f"ADAUSDT PnL of the third round trip is {third_ada}, expected {expected}")
+        if 'ADAUSDT' in trade_journal.symbol_pnl(0, 5500):
+            failures.append("ADAUSDT appears in a range with no sell")
+
+    bnb_order = order(0, 'SOLUSDT', 'BUY', 2, 200, [fill(100, 1, 0.0005, 'BNB'), fill(100, 1, 0.0005, 'BNB')])
+    fee = journal.fee_in_usdt(bnb_order, {'BNBUSDT': 400.0})
+    if not close(fee, 0.4):
+        failures.append(f"BNB fee of 0.001 BNB at 400 USDT valued at {fee}, expected 0.4")
+    if journal.fee_prices(order(0, 'SOLUSDT', 'BUY', 1, 100, [fill(100, 1, 0.1, 'USDT')])) is not None:
+        failures.append("fetched prices for an order with its fee in USDT")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: round trips paired with their own buys, pre-journal sells unpriced, BNB fees valued")
+
+if __name__ == "__main__":
+    main()
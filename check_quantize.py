@@ -0,0 +1,77 @@
+"""
+Property check of order quantization against the exchange's LOT_SIZE rule:
+random quantities and step sizes are floored with format_quantity and
+quantize_batch and compared with a Decimal floor-to-step. Every result must
+be an exact multiple of the step, never above the quantity, and formatted
+without scientific notation. Exits non-zero on the first mismatches.
+
+Usage: python check_quantize.py [cases] [seed]
+"""
+import sys
+import random
+from decimal import Decimal, ROUND_DOWN
+import quantize
+
+# Step sizes seen on Binance spot, plus non-power-of-ten ones
+STEP_SIZES = [100.0, 10.0, 1.0, 0.1, 0.01, 0.001, 1e-5, 1e-8, 0.05, 0.25, 0.00025, 5e-6]
+MAX_REPORTED = 10
+
+def random_quantity(rng, step):
+    """Exact step multiples, rounded decimals, and arbitrary floats across many magnitudes."""
+    kind = rng.random()
+    if kind < 0.4:
+        return float(rng.randint(0, 10 ** 9) * Decimal(repr(step)))
+    if kind < 0.7:
+        return round(rng.uniform(0, 1e6), rng.randint(0, 10))
+    return rng.uniform(0, 10) * 10 ** rng.randint(-8, 6)
+
+def expected_floor(quantity, step):
+    """The largest multiple of the step at or below the quantity, in exact decimal arithmetic."""
+    step = Decimal(repr(step))
+    return (Decimal(repr(quantity)) / step).to_integral_value(ROUND_DOWN) * step
+
+def check(quantity, step, result):
+    """Return the rule a formatted quantity breaks, or None."""
+    if 'e' in result.lower():
+        return "scientific notation"
+    value = Decimal(result)
+    if value > Decimal(repr(quantity)):
+        return "rounded up past the quantity"
+    if value % Decimal(repr(step)):
+        return "not a multiple of the step"
+    if value != expected_floor(quantity, step):
+        return f"expected {expected_floor(quantity, step)}"
+    return None
+
+def main():
+    cases = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    rng = random.Random(seed)
+    steps = [rng.choice(STEP_SIZES) for _ in range(cases)]
+    quantities = [random_quantity(rng, step) for step in steps]
+
+    failures = []
+    for quantity, step in zip(quantities, steps):
+        result = quantize.format_quantity(quantity, step)
+        reason = check(quantity, step, result)
+        if reason is None and quantize.floor_to_step(quantity, step) != float(result):
+            reason = "floor_to_step disagrees with format_quantity"
+        if reason:
+            failures.append(f"format_quantity({quantity!r}, {step!r}) = {result}: {reason}")
+
+    strings, floored, _ = quantize.quantize_batch(quantities, steps)
+    for quantity, step, result, value in zip(quantities, steps, strings, floored):
+        reason = check(quantity, step, result)
+        if reason is None and value != float(result):
+            reason = f"float result {value!r} differs from the string"
+        if reason:
+            failures.append(f"quantize_batch({quantity!r}, {step!r}) = {result}: {reason}")
+
+    for failure in failures[:MAX_REPORTED]:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(f"{len(failures)} failures in {cases} cases")
+    print(f"OK: {cases} random quantities floored exactly by format_quantity and quantize_batch")
+
+if __name__ == "__main__":
+    main()
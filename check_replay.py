@@ -0,0 +1,102 @@
+"""
+Check the streaming mode against the local replay server: replay recorded
+ticker and kline frames into a MarketStream, then check that the tickers are
+populated and that closed candles, and only those, reach the kline store.
+Exits non-zero on failure.
+
+Usage: python check_replay.py [frames.jsonl]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+import kline_store
+import market_stream
+import replay_server
+
+SYMBOLS = ['BTCUSDT', 'ETHUSDT']
+INTERVAL = '1m'
+MINUTE_MS = 60_000
+START_MS = 1_700_000_000_000
+
+def ticker_event(symbol, close, change_percent):
+    return {
+        'e': '24hrTicker', 's': symbol, 'p': '0', 'P': f"{change_percent}", 'c': f"{close}", 'o': f"{close}",
+        'h': f"{close}", 'l': f"{close}", 'v': '1000', 'q': f"{1000 * close}", 'C': START_MS,
+    }
+
+def kline_event(symbol, open_time, close, closed):
+    return {
+        'e': 'kline', 's': symbol, 'k': {
+            't': open_time, 'T': open_time + MINUTE_MS - 1, 's': symbol, 'i': INTERVAL, 'o': f"{close}",
+            'c': f"{close}", 'h': f"{close}", 'l': f"{close}", 'v': '10', 'q': f"{10 * close}", 'n': 5,
+            'V': '5', 'Q': f"{5 * close}", 'x': closed,
+        },
+    }
+
+def make_frames():
+    """A ticker snapshot, three closed candles per symbol and one still open, as combined-stream frames."""
+    frames = [{'result': None, 'id': 1}, {'stream': '!ticker@arr', 'data': [
+        ticker_event(symbol, 100.0 * (i + 1), 2.5 * (i + 1)) for i, symbol in enumerate(SYMBOLS)
+    ]}]
+    for minute in range(4):
+        for i, symbol in enumerate(SYMBOLS):
+            stream = f"{symbol.lower()}@kline_{INTERVAL}"
+            open_time = START_MS + minute * MINUTE_MS
+            close = 100.0 * (i + 1) + minute
+            # Every candle is first seen open; the last one never closes
+            frames.append({'stream': stream, 'data': kline_event(symbol, open_time, close, False)})
+            if minute < 3:
+                frames.append({'stream': stream, 'data': kline_event(symbol, open_time, close, True)})
+    return [json.dumps(frame) for frame in frames]
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+def main():
+    frames = replay_server.load_frames(sys.argv[1]) if len(sys.argv) > 1 else make_frames()
+    port = free_port()
+    replay_server.start_in_thread(frames, port=port)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = kline_store.KlineStore(os.path.join(tmp, 'klines.db'))
+        stream = market_stream.MarketStream(SYMBOLS, [INTERVAL], url=f"ws://localhost:{port}", store=store,
+                                            record_path=None)
+        stream.start()
+        try:
+            if not stream.wait_until_ready():
+                sys.exit("FAIL: no ticker frame arrived from the replay server")
+            # Frames arrive in order, so wait for the last closed candle
+            deadline = time.monotonic() + 10
+            while len(store.load(SYMBOLS[-1], INTERVAL, START_MS)) < 3 and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            stream.stop()
+
+        failures = []
+        tickers = {ticker['symbol']: ticker for ticker in stream.get_tickers()}
+        if sorted(tickers) != sorted(SYMBOLS):
+            failures.append(f"tickers for {sorted(tickers)}, expected {sorted(SYMBOLS)}")
+        elif float(tickers['ETHUSDT']['priceChangePercent']) != 5.0 or float(tickers['BTCUSDT']['lastPrice']) != 100.0:
+            failures.append(f"ticker fields not carried over: {tickers}")
+        for i, symbol in enumerate(SYMBOLS):
+            stored = store.load(symbol, INTERVAL, START_MS)
+            open_times = [int(kline[0]) for kline in stored]
+            expected = [START_MS + minute * MINUTE_MS for minute in range(3)]
+            if open_times != expected:
+                failures.append(f"{symbol}: stored candles open at {open_times}, expected the 3 closed ones {expected}")
+            elif [float(kline[4]) for kline in stored] != [100.0 * (i + 1) + minute for minute in range(3)]:
+                failures.append(f"{symbol}: stored closes {[kline[4] for kline in stored]}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"OK: {len(frames)} frames replayed, {len(tickers)} tickers, 3 closed candles stored per symbol")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Lazily constructed, shared Binance client.
+Heavy dependencies (python-binance, pandas, numpy, websockets, requests) are
+imported inside the functions that use them, so importing a module stays cheap
+and no network request happens before the first API call.
+"""
+import threading
+import config
+import metrics
+import paper
+import rate_limit
+
+_client = None
+_lock = threading.Lock()
+
+def get_client():
+    """Return the shared Binance client, constructing it on first use."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                from binance.client import Client
+                # Skip the constructor's ping; the first real call surfaces connectivity errors
+                new_client = Client(config.API_KEY, config.API_SECRET, ping=False)
+                if config.API_URL:
+                    new_client.API_URL = f"{config.API_URL}/api"
+                    new_client.MARGIN_API_URL = f"{config.API_URL}/sapi"
+                rate_limit.request_scheduler.install(new_client)
+                rate_limit.request_counter.install(new_client)
+                new_client.session.hooks['response'].append(metrics.on_binance_response)
+                if paper.is_enabled():
+                    # Orders, balances and dust conversions go to the virtual ledger
+                    paper.broker.install(new_client)
+                _client = new_client
+    return _client
+
+class LazyClient:
+    """Stand-in for the shared client that builds it on first attribute access."""
+    def __getattr__(self, name):
+        return getattr(get_client(), name)
+
+# Shared by every module in place of a per-module Client
+client = LazyClient()
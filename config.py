@@ -0,0 +1,12 @@
+"""Shared configuration bootstrap: the .env file is loaded once, on first import."""
+import os
+from dotenv import load_dotenv
+
+# Load API keys and settings from .env file
+load_dotenv('.env')
+
+API_KEY = os.getenv('BINANCE_API_KEY')
+API_SECRET = os.getenv('BINANCE_API_SECRET')
+
+# Base URL override (e.g. http://localhost:8800 for fake_exchange.py); unset uses Binance
+API_URL = os.getenv('BINANCE_API_URL')
@@ -0,0 +1,101 @@
+import os
+import time
+import config
+import price_snapshot
+import user_stream
+
+# Balances worth less than this many USDT are converted to BNB
+DUST_THRESHOLD_USDT = float(os.getenv('DUST_THRESHOLD_USDT', 1))
+# Assets converted per transfer_dust call
+DUST_BATCH_SIZE = int(os.getenv('DUST_BATCH_SIZE', 10))
+# How long to wait for converted balances to show up as cleared
+DUST_SETTLE_TIMEOUT = 5
+DUST_SETTLE_POLL = 1
+# Quote assets tried, in order, when valuing an asset with no USDT market
+ROUTE_QUOTES = ('BTC', 'BNB')
+
+def usdt_value(asset, amount, prices, to_btc=None):
+    """
+    Value an amount in USDT from one price snapshot, through the USDT market
+    when there is one, otherwise through a BTC or BNB pair.
+    Returns None when no route prices the asset.
+    """
+    if asset == 'USDT':
+        return amount
+    price = prices.get(f"{asset}USDT")
+    if price is not None:
+        return amount * price
+    for quote in ROUTE_QUOTES:
+        pair_price, quote_price = prices.get(f"{asset}{quote}"), prices.get(f"{quote}USDT")
+        if pair_price is not None and quote_price is not None:
+            return amount * pair_price * quote_price
+    # The dust endpoint already values every eligible asset in BTC
+    if to_btc is not None and prices.get('BTCUSDT') is not None:
+        return to_btc * prices['BTCUSDT']
+    return None
+
+def find_dust(client, threshold=DUST_THRESHOLD_USDT):
+    """
+    List the (asset, USDT value) pairs the exchange will convert to BNB and
+    that are worth less than the threshold, from one dust-eligibility query
+    and one price snapshot.
+    """
+    details = client.get_dust_assets().get('details', [])
+    prices = price_snapshot.snapshot.get_prices(client)
+    dust = []
+    for detail in details:
+        asset = detail['asset']
+        if asset in ('USDT', 'BNB'):
+            continue
+        value = usdt_value(asset, float(detail['amountFree']), prices, to_btc=float(detail.get('toBTC') or 0))
+        if value is None:
+            print(f"Could not value {asset} in USDT: no USDT, BTC or BNB market")
+            continue
+        if value < threshold:
+            dust.append((asset, value))
+    return dust
+
+def transfer(client, assets, batch_size=DUST_BATCH_SIZE):
+    """Convert assets to BNB in batches of batch_size per transfer_dust call. Returns the converted assets."""
+    converted = []
+    total_bnb, total_charge = 0.0, 0.0
+    for start in range(0, len(assets), batch_size):
+        batch = assets[start:start + batch_size]
+        try:
+            print(f"Converting to BNB: {','.join(batch)}")
+            result = client.transfer_dust(asset=','.join(batch))
+            total_bnb += float(result.get('totalTransfered', 0))
+            total_charge += float(result.get('totalServiceCharge', 0))
+            converted.extend(item['fromAsset'] for item in result.get('transferResult', []))
+        except Exception as e:
+            print(f"Error during dust transfer of {','.join(batch)}: {e}")
+    if converted:
+        print("Dust transfer completed:")
+        print(f"Total BNB received: {total_bnb:.8f} BNB")
+        print(f"Service charge: {total_charge:.8f} BNB")
+    return converted
+
+def sweep(client, threshold=DUST_THRESHOLD_USDT):
+    """Convert every dust balance to BNB and wait for the balance book to show it. Returns the converted assets."""
+    try:
+        dust = find_dust(client, threshold)
+    except Exception as e:
+        print(f"Error fetching dust-eligible assets: {e}")
+        return []
+    if not dust:
+        print("No assets to convert to BNB")
+        return []
+
+    converted = transfer(client, [asset for asset, _ in dust])
+    if converted:
+        # Wait for the converted balances to clear
+        cleared = lambda balances: not any(balances.get(asset) for asset in converted)
+        settled = user_stream.wait_for_balances(cleared, timeout=DUST_SETTLE_TIMEOUT)
+        if settled is None:
+            # Without the user stream, poll the account instead
+            deadline = time.monotonic() + DUST_SETTLE_TIMEOUT
+            while not cleared({b['asset']: b['free'] for b in user_stream.get_balances(client)}):
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(DUST_SETTLE_POLL)
+    return converted
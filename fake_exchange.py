@@ -0,0 +1,587 @@
+"""
+Local stand-in for the Binance and CoinGecko endpoints the bot uses, for
+deterministic offline runs and load tests.
+
+Serves over HTTP: ping, ticker/24hr, ticker/price, klines, depth,
+exchangeInfo, account, order (new and query), asset/dust-btc, asset/dust, CoinGecko's
+coins/markets and the Telegram Bot API's sendMessage. Serves over websocket:
+the !ticker@arr and <symbol>@kline_<interval> streams, and the user-data
+stream at /ws/<listenKey>. Prices follow
+deterministic per-symbol curves, so every run sees the same market.
+
+Latency, request-weight limits (429, then 418 when requests continue after
+a 429) and partial fills can be injected.
+
+Point the bot at it with:
+    BINANCE_API_URL=http://localhost:8800
+    COINGECKO_URL=http://localhost:8800/coingecko
+    TELEGRAM_API_URL=http://localhost:8800/telegram
+    MARKET_STREAM_URL=ws://localhost:8801
+    USER_STREAM_URL=ws://localhost:8801/ws
+
+Usage: python fake_exchange.py [--port 8800] [--ws-port 8801] [--latency-ms 50]
+                               [--weight-limit 6000] [--partial-fill-rate 0.2]
+"""
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import threading
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+DAY_MS = 24 * 60 * 60 * 1000
+INTERVAL_MS = {'1m': 60_000, '5m': 300_000, '15m': 900_000, '1h': 3_600_000, '4h': 14_400_000, '1d': DAY_MS}
+
+# Request weight charged per endpoint, as documented by Binance
+ENDPOINT_WEIGHTS = {
+    ('GET', '/api/v3/ping'): 1,
+    ('GET', '/api/v3/ticker/24hr'): 80,
+    ('GET', '/api/v3/ticker/price'): 4,
+    ('GET', '/api/v3/klines'): 2,
+    ('GET', '/api/v3/depth'): 5,
+    ('GET', '/api/v3/exchangeInfo'): 20,
+    ('GET', '/api/v3/account'): 20,
+    ('POST', '/api/v3/order'): 1,
+    ('GET', '/api/v3/order'): 4,
+    ('POST', '/sapi/v1/asset/dust-btc'): 1,
+    ('POST', '/sapi/v1/asset/dust'): 10,
+    ('POST', '/api/v3/userDataStream'): 2,
+    ('PUT', '/api/v3/userDataStream'): 2,
+    ('DELETE', '/api/v3/userDataStream'): 2,
+}
+
+DEFAULT_ASSETS = [
+    'BTC', 'ETH', 'BNB', 'SOL', 'XRP', 'ADA', 'DOGE', 'TRX', 'DOT', 'LINK',
+    'AVAX', 'MATIC', 'LTC', 'ATOM', 'UNI', 'XLM', 'NEAR', 'APT', 'ARB', 'OP',
+]
+
+# Reference prices for the majors; the rest are drawn at random
+MAJOR_PRICES = {'BTC': 60000.0, 'ETH': 3000.0, 'BNB': 500.0}
+
+class ApiError(Exception):
+    def __init__(self, status, code, msg, headers=None):
+        super().__init__(msg)
+        self.status = status
+        self.code = code
+        self.msg = msg
+        self.headers = headers or {}
+
+def step_for_price(price):
+    """Pick a LOT_SIZE step worth roughly a cent or less."""
+    return min(1.0, 10 ** math.floor(math.log10(0.1 / price)))
+
+class FakeExchange:
+    """In-memory exchange state and request handling behind the fake HTTP server."""
+    def __init__(self, assets=None, balances=None, seed=0, latency=0.0, weight_limit=6000,
+                 partial_fill_rate=0.0, ws_interval=1.0):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.assets = list(assets or DEFAULT_ASSETS)
+        self.symbols = {}
+        for i, asset in enumerate(self.assets):
+            self.symbols[f"{asset}USDT"] = {
+                'base': asset,
+                'price': MAJOR_PRICES.get(asset) or round(10 ** self.rng.uniform(-3, 2), 6),
+                'amplitude': self.rng.uniform(0.05, 0.6),
+                'period': self.rng.uniform(10, 60),
+                'phase': self.rng.uniform(0, 2 * math.pi),
+                'rank': i + 1,
+            }
+        for info in self.symbols.values():
+            info['step'] = step_for_price(info['price'])
+        self.balances = dict(balances or {'USDT': 1000.0, 'ETH': 0.05, 'SOL': 1.2, 'DOGE': 3.0, 'XLM': 0.4})
+        self.latency = latency
+        self.weight_limit = weight_limit
+        self.partial_fill_rate = partial_fill_rate
+        self.ws_interval = ws_interval
+        self.orders = {}
+        self.next_order_id = 1
+        self.lock = threading.Lock()
+        self.window = 0
+        self.used_weight = 0
+        self.order_count_10s = (0, 0)
+        self.rate_limited_at = None
+        self.banned_until = 0.0
+        self.request_counts = {}
+        self.telegram_messages = []
+        self.user_queues = set()
+        self.http_server = None
+        self.ws_loop = None
+
+    # Market model
+
+    def price_at(self, symbol, ts_ms):
+        """Deterministic, bounded price curve: a slow per-symbol cycle with a daily wobble."""
+        info = self.symbols[symbol]
+        days = ts_ms / DAY_MS
+        cycle = info['amplitude'] * math.sin(2 * math.pi * days / info['period'] + info['phase'])
+        return info['price'] * math.exp(cycle) * (1 + 0.02 * math.sin(2 * math.pi * days + info['phase']))
+
+    def now_ms(self):
+        return int(time.time() * 1000)
+
+    def kline(self, symbol, open_time, interval_ms):
+        now = self.now_ms()
+        close_time = open_time + interval_ms - 1
+        prices = [self.price_at(symbol, t) for t in (open_time, open_time + interval_ms / 2, min(close_time, now))]
+        volume = 1000 + 100 * (open_time // interval_ms % 7)
+        return [
+            open_time, f"{prices[0]:.8f}", f"{max(prices):.8f}", f"{min(prices):.8f}", f"{prices[-1]:.8f}",
+            f"{volume:.8f}", close_time, f"{volume * prices[-1]:.8f}", 100, f"{volume / 2:.8f}",
+            f"{volume * prices[-1] / 2:.8f}", '0'
+        ]
+
+    def ticker(self, symbol):
+        now = self.now_ms()
+        last, open_ = self.price_at(symbol, now), self.price_at(symbol, now - DAY_MS)
+        return {
+            'symbol': symbol,
+            'priceChange': f"{last - open_:.8f}",
+            'priceChangePercent': f"{(last / open_ - 1) * 100:.3f}",
+            'lastPrice': f"{last:.8f}",
+            'openPrice': f"{open_:.8f}",
+            'highPrice': f"{max(last, open_):.8f}",
+            'lowPrice': f"{min(last, open_):.8f}",
+            'volume': '100000.00000000',
+            'quoteVolume': f"{100000 * last:.8f}",
+            'closeTime': now,
+        }
+
+    def order_book(self, params):
+        """Synthetic book around the current price: 1 bp spread, levels 5 bp apart, deeper further out."""
+        symbol = self.get_symbol(params)
+        price = self.price_at(symbol, self.now_ms())
+        limit = min(int(params.get('limit', 100)), 5000)
+        levels = [(i * 0.0005 + 0.00005, 200 * (1 + i) / price) for i in range(limit)]
+        return {
+            'lastUpdateId': self.now_ms(),
+            'bids': [[f"{price * (1 - offset):.8f}", f"{qty:.8f}"] for offset, qty in levels],
+            'asks': [[f"{price * (1 + offset):.8f}", f"{qty:.8f}"] for offset, qty in levels],
+        }
+
+    # Rate limits
+
+    def charge(self, method, path):
+        """Account request weight for the current minute; raise 429/418 past the limit."""
+        now = time.time()
+        weight = ENDPOINT_WEIGHTS.get((method, path), 1)
+        with self.lock:
+            self.request_counts[f"{method} {path}"] = self.request_counts.get(f"{method} {path}", 0) + 1
+            if now < self.banned_until:
+                retry_after = int(self.banned_until - now) + 1
+                raise ApiError(418, -1003, "Way too many requests; IP banned.", {'Retry-After': str(retry_after)})
+            window = int(now // 60)
+            if window != self.window:
+                self.window, self.used_weight, self.rate_limited_at = window, 0, None
+            self.used_weight += weight
+            headers = {'X-MBX-USED-WEIGHT-1M': str(self.used_weight)}
+            if self.weight_limit and self.used_weight > self.weight_limit:
+                retry_after = 60 - int(now % 60)
+                if self.rate_limited_at is not None:
+                    # Ignoring a 429 gets the IP banned
+                    self.banned_until = now + 2 * retry_after
+                    raise ApiError(418, -1003, "Way too many requests; IP banned.", {'Retry-After': str(2 * retry_after)})
+                self.rate_limited_at = now
+                headers['Retry-After'] = str(retry_after)
+                raise ApiError(429, -1003, "Too much request weight used.", headers)
+            if (method, path) == ('POST', '/api/v3/order'):
+                window_10s = int(now // 10)
+                start, count = self.order_count_10s
+                count = count + 1 if start == window_10s else 1
+                self.order_count_10s = (window_10s, count)
+                headers['X-MBX-ORDER-COUNT-10S'] = str(count)
+            return headers
+
+    # Endpoints
+
+    def get_symbol(self, params):
+        symbol = params.get('symbol')
+        if symbol not in self.symbols:
+            raise ApiError(400, -1121, "Invalid symbol.")
+        return symbol
+
+    def exchange_info(self, params):
+        return {'timezone': 'UTC', 'serverTime': self.now_ms(), 'symbols': [
+            {
+                'symbol': symbol,
+                'status': 'TRADING',
+                'baseAsset': info['base'],
+                'quoteAsset': 'USDT',
+                'filters': [
+                    {'filterType': 'PRICE_FILTER', 'minPrice': '0.00000001', 'maxPrice': '1000000.00000000', 'tickSize': '0.00000001'},
+                    {'filterType': 'LOT_SIZE', 'minQty': f"{info['step']:.8f}", 'maxQty': '90000000.00000000', 'stepSize': f"{info['step']:.8f}"},
+                    {'filterType': 'NOTIONAL', 'minNotional': '5.00000000', 'applyMinToMarket': True},
+                ],
+            }
+            for symbol, info in self.symbols.items()
+        ]}
+
+    def klines(self, params):
+        symbol = self.get_symbol(params)
+        interval_ms = INTERVAL_MS[params['interval']]
+        limit = min(int(params.get('limit', 500)), 1000)
+        now = self.now_ms()
+        end = min(int(params.get('endTime', now)), now)
+        if 'startTime' in params:
+            start = -(-int(params['startTime']) // interval_ms) * interval_ms
+        else:
+            start = (end // interval_ms - limit + 1) * interval_ms
+        # Listing date: no candles before one year ago
+        start = max(start, (now - 365 * DAY_MS) // interval_ms * interval_ms)
+        end = min(end, start + (limit - 1) * interval_ms)
+        return [self.kline(symbol, t, interval_ms) for t in range(start, end + 1, interval_ms)]
+
+    def account(self, params):
+        with self.lock:
+            balances = [
+                {'asset': asset, 'free': f"{amount:.8f}", 'locked': '0.00000000'}
+                for asset, amount in self.balances.items()
+            ]
+        return {'canTrade': True, 'accountType': 'SPOT', 'updateTime': self.now_ms(), 'balances': balances}
+
+    def push_user_event(self, event):
+        """Send an event to every connected user-data stream."""
+        if self.ws_loop is None:
+            return
+        raw = json.dumps(event)
+        for user_queue in list(self.user_queues):
+            self.ws_loop.call_soon_threadsafe(user_queue.put_nowait, raw)
+
+    def push_positions(self, assets, update_time):
+        with self.lock:
+            positions = [{'a': asset, 'f': f"{self.balances.get(asset, 0):.8f}", 'l': '0.00000000'} for asset in assets]
+        self.push_user_event({'e': 'outboundAccountPosition', 'E': update_time, 'u': update_time, 'B': positions})
+
+    def push_execution(self, order, executed, quote):
+        self.push_user_event({
+            'e': 'executionReport', 'E': self.now_ms(), 's': order['symbol'], 'c': order['clientOrderId'],
+            'S': order['side'], 'o': order['type'], 'q': order['origQty'], 'i': order['orderId'],
+            'X': 'FILLED' if executed == float(order['origQty']) else 'PARTIALLY_FILLED',
+            'z': f"{executed:.8f}", 'Z': f"{quote:.8f}", 'T': order['transactTime'],
+        })
+
+    def new_order(self, params):
+        symbol = self.get_symbol(params)
+        info = self.symbols[symbol]
+        price = self.price_at(symbol, self.now_ms())
+        step = Decimal(f"{info['step']:.8f}")
+        if 'quoteOrderQty' in params:
+            quantity = (Decimal(params['quoteOrderQty']) / Decimal(repr(price))) // step * step
+        else:
+            quantity = Decimal(params['quantity'])
+            if quantity % step != 0:
+                raise ApiError(400, -1013, "Filter failure: LOT_SIZE")
+        if quantity < step:
+            raise ApiError(400, -1013, "Filter failure: LOT_SIZE")
+        if float(quantity) * price < 5:
+            raise ApiError(400, -1013, "Filter failure: NOTIONAL")
+
+        quantity = float(quantity)
+        quote = quantity * price
+        with self.lock:
+            if params['side'] == 'BUY':
+                if self.balances.get('USDT', 0) < quote:
+                    raise ApiError(400, -2010, "Account has insufficient balance for requested action.")
+                self.balances['USDT'] -= quote
+                self.balances[info['base']] = self.balances.get(info['base'], 0) + quantity * 0.999
+            else:
+                if self.balances.get(info['base'], 0) + 1e-12 < quantity:
+                    raise ApiError(400, -2010, "Account has insufficient balance for requested action.")
+                self.balances[info['base']] -= quantity
+                self.balances['USDT'] = self.balances.get('USDT', 0) + quote * 0.999
+            order_id = self.next_order_id
+            self.next_order_id += 1
+            partial = self.rng.random() < self.partial_fill_rate
+            order = {
+                'symbol': symbol, 'orderId': order_id, 'clientOrderId': f"fake{order_id}",
+                'transactTime': self.now_ms(), 'price': '0.00000000',
+                'origQty': f"{quantity:.8f}", 'type': 'MARKET', 'side': params['side'],
+                'status': 'FILLED', 'executedQty': f"{quantity:.8f}",
+                'cummulativeQuoteQty': f"{quote:.8f}",
+                'fills': [{'price': f"{price:.8f}", 'qty': f"{quantity:.8f}",
+                           'commission': f"{quote * 0.001:.8f}", 'commissionAsset': 'USDT'}],
+            }
+            self.orders[order_id] = dict(order)
+        if partial:
+            self.push_execution(order, float(order['origQty']) / 2, quote / 2)
+        self.push_execution(order, float(order['origQty']), quote)
+        self.push_positions(['USDT', info['base']], order['transactTime'])
+        if partial:
+            # Report a partial fill now; the order completes when queried
+            order.update(status='PARTIALLY_FILLED', executedQty=f"{quantity / 2:.8f}",
+                         cummulativeQuoteQty=f"{quote / 2:.8f}")
+            order['fills'][0]['qty'] = f"{quantity / 2:.8f}"
+        return order
+
+    def query_order(self, params):
+        self.get_symbol(params)
+        order = self.orders.get(int(params['orderId']))
+        if order is None:
+            raise ApiError(400, -2013, "Order does not exist.")
+        return {key: value for key, value in order.items() if key != 'fills'}
+
+    def dust_assets(self, params):
+        btc_price = self.price_at('BTCUSDT', self.now_ms())
+        details = []
+        with self.lock:
+            for asset, amount in self.balances.items():
+                symbol = f"{asset}USDT"
+                if asset in ('USDT', 'BNB') or amount <= 0 or symbol not in self.symbols:
+                    continue
+                to_btc = amount * self.price_at(symbol, self.now_ms()) / btc_price
+                if to_btc < 0.001:
+                    details.append({'asset': asset, 'assetFullName': asset, 'amountFree': f"{amount:.8f}",
+                                    'toBTC': f"{to_btc:.8f}", 'toBNB': f"{to_btc * 100:.8f}",
+                                    'toBNBOffExchange': f"{to_btc * 100:.8f}", 'exchange': '0'})
+        return {'details': details, 'totalTransferBtc': '0', 'totalTransferBNB': '0', 'dribbletPercentage': '0.02'}
+
+    def dust(self, params, raw_params):
+        assets = [a for value in raw_params.get('asset', []) for a in value.split(',') if a]
+        btc_price = self.price_at('BTCUSDT', self.now_ms())
+        bnb_price = self.price_at('BNBUSDT', self.now_ms()) if 'BNBUSDT' in self.symbols else 500.0
+        results, total = [], 0.0
+        with self.lock:
+            for asset in assets:
+                amount = self.balances.get(asset, 0)
+                symbol = f"{asset}USDT"
+                if amount <= 0 or symbol not in self.symbols:
+                    continue
+                value = amount * self.price_at(symbol, self.now_ms())
+                if value / btc_price >= 0.001:
+                    raise ApiError(400, -5002, f"{asset} is not eligible for dust conversion.")
+                bnb = value / bnb_price * 0.98
+                self.balances[asset] = 0.0
+                self.balances['BNB'] = self.balances.get('BNB', 0) + bnb
+                total += bnb
+                results.append({'fromAsset': asset, 'amount': f"{amount:.8f}", 'transferedAmount': f"{bnb:.8f}",
+                                'serviceChargeAmount': f"{bnb * 0.02:.8f}", 'operateTime': self.now_ms()})
+        self.push_positions([result['fromAsset'] for result in results] + ['BNB'], self.now_ms())
+        return {'totalServiceCharge': f"{total * 0.02:.8f}", 'totalTransfered': f"{total:.8f}", 'transferResult': results}
+
+    def coins_markets(self, params):
+        per_page = int(params.get('per_page', 100))
+        return [
+            {'id': info['base'].lower(), 'symbol': info['base'].lower(), 'market_cap_rank': info['rank']}
+            for info in sorted(self.symbols.values(), key=lambda info: info['rank'])
+        ][:per_page]
+
+    def telegram_send(self, params):
+        """Bot API sendMessage, with Telegram's length and Markdown checks."""
+        text = params.get('text', '')
+        if len(text) > 4096:
+            return 400, {}, {'ok': False, 'error_code': 400, 'description': 'Bad Request: message is too long'}
+        if params.get('parse_mode') == 'Markdown' and any(text.count(c) % 2 for c in '*_'):
+            return 400, {}, {'ok': False, 'error_code': 400,
+                             'description': "Bad Request: can't parse entities: can't find end of the entity"}
+        with self.lock:
+            self.telegram_messages.append(params)
+            message_id = len(self.telegram_messages)
+        return 200, {}, {'ok': True, 'result': {'message_id': message_id, 'text': text}}
+
+    def handle(self, method, path, params, raw_params):
+        """Dispatch one request; returns (status, headers, body)."""
+        if self.latency:
+            time.sleep(self.latency)
+        if path.endswith('/coins/markets'):
+            return 200, {}, self.coins_markets(params)
+        if path.endswith('/sendMessage'):
+            return self.telegram_send(params)
+        headers = self.charge(method, path)
+        routes = {
+            ('GET', '/api/v3/ping'): lambda: {},
+            ('GET', '/api/v3/time'): lambda: {'serverTime': self.now_ms()},
+            ('GET', '/api/v3/ticker/24hr'): lambda: (
+                self.ticker(self.get_symbol(params)) if 'symbol' in params else [self.ticker(s) for s in self.symbols]),
+            ('GET', '/api/v3/ticker/price'): lambda: (
+                {'symbol': self.get_symbol(params), 'price': f"{self.price_at(params['symbol'], self.now_ms()):.8f}"}
+                if 'symbol' in params else
+                [{'symbol': s, 'price': f"{self.price_at(s, self.now_ms()):.8f}"} for s in self.symbols]),
+            ('GET', '/api/v3/klines'): lambda: self.klines(params),
+            ('GET', '/api/v3/depth'): lambda: self.order_book(params),
+            ('GET', '/api/v3/exchangeInfo'): lambda: self.exchange_info(params),
+            ('GET', '/api/v3/account'): lambda: self.account(params),
+            ('POST', '/api/v3/order'): lambda: self.new_order(params),
+            ('GET', '/api/v3/order'): lambda: self.query_order(params),
+            ('POST', '/sapi/v1/asset/dust-btc'): lambda: self.dust_assets(params),
+            ('POST', '/sapi/v1/asset/dust'): lambda: self.dust(params, raw_params),
+            ('POST', '/api/v3/userDataStream'): lambda: {'listenKey': f"fakelistenkey{self.seed}"},
+            ('PUT', '/api/v3/userDataStream'): lambda: {},
+            ('DELETE', '/api/v3/userDataStream'): lambda: {},
+        }
+        route = routes.get((method, path))
+        if route is None:
+            raise ApiError(404, -1000, f"Unknown endpoint {method} {path}")
+        return 200, headers, route()
+
+    # Websocket streams
+
+    def stream_frames(self, subscriptions):
+        """Build one round of frames for the subscribed streams."""
+        frames = []
+        if '!ticker@arr' in subscriptions:
+            data = []
+            for symbol in self.symbols:
+                t = self.ticker(symbol)
+                data.append({'e': '24hrTicker', 'E': t['closeTime'], 's': symbol, 'p': t['priceChange'],
+                             'P': t['priceChangePercent'], 'c': t['lastPrice'], 'o': t['openPrice'],
+                             'h': t['highPrice'], 'l': t['lowPrice'], 'v': t['volume'],
+                             'q': t['quoteVolume'], 'C': t['closeTime']})
+            frames.append({'stream': '!ticker@arr', 'data': data})
+        for stream in sorted(subscriptions):
+            if '@kline_' not in stream:
+                continue
+            name, interval = stream.split('@kline_')
+            symbol = name.upper()
+            if symbol not in self.symbols or interval not in INTERVAL_MS:
+                continue
+            interval_ms = INTERVAL_MS[interval]
+            k = self.kline(symbol, self.now_ms() // interval_ms * interval_ms, interval_ms)
+            frames.append({'stream': stream, 'data': {'e': 'kline', 'E': self.now_ms(), 's': symbol, 'k': {
+                't': k[0], 'T': k[6], 's': symbol, 'i': interval, 'o': k[1], 'c': k[4], 'h': k[2],
+                'l': k[3], 'v': k[5], 'n': k[8], 'x': False, 'q': k[7], 'V': k[9], 'Q': k[10]}}})
+        return frames
+
+    async def _user_stream_handler(self, websocket):
+        user_queue = asyncio.Queue()
+
+        async def forward():
+            while True:
+                await websocket.send(await user_queue.get())
+
+        self.user_queues.add(user_queue)
+        sender = asyncio.ensure_future(forward())
+        try:
+            await websocket.wait_closed()
+        finally:
+            sender.cancel()
+            self.user_queues.discard(user_queue)
+
+    async def _ws_handler(self, websocket):
+        from websockets.exceptions import ConnectionClosed
+        if websocket.request.path.startswith('/ws/'):
+            await self._user_stream_handler(websocket)
+            return
+        subscriptions = set()
+
+        async def read_requests():
+            async for raw in websocket:
+                request = json.loads(raw)
+                if request.get('method') == 'SUBSCRIBE':
+                    subscriptions.update(request['params'])
+                await websocket.send(json.dumps({'result': None, 'id': request.get('id')}))
+
+        reader = asyncio.ensure_future(read_requests())
+        try:
+            while not reader.done():
+                for frame in self.stream_frames(subscriptions):
+                    await websocket.send(json.dumps(frame))
+                await asyncio.sleep(self.ws_interval)
+        except ConnectionClosed:
+            pass
+        finally:
+            reader.cancel()
+
+    async def _ws_main(self, host, port, ready):
+        from websockets.asyncio.server import serve
+        async with serve(self._ws_handler, host, port) as server:
+            self.ws_server = server
+            ready.set()
+            await server.serve_forever()
+
+    # Server lifecycle
+
+    def start(self, host='localhost', port=8800, ws_port=8801):
+        """Start the HTTP and websocket servers on daemon threads."""
+        exchange = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _dispatch(self, method):
+                url = urlparse(self.path)
+                raw_params = parse_qs(url.query)
+                body = {}
+                if method in ('POST', 'PUT', 'DELETE'):
+                    length = int(self.headers.get('Content-Length') or 0)
+                    data = self.rfile.read(length).decode()
+                    if self.headers.get('Content-Type', '').startswith('application/json'):
+                        body = json.loads(data or '{}')
+                    else:
+                        for key, values in parse_qs(data).items():
+                            raw_params.setdefault(key, []).extend(values)
+                params = {key: values[-1] for key, values in raw_params.items()}
+                params.update(body)
+                try:
+                    status, headers, body = exchange.handle(method, url.path, params, raw_params)
+                except ApiError as e:
+                    status, headers, body = e.status, e.headers, {'code': e.code, 'msg': e.msg}
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+            def do_PUT(self):
+                self._dispatch('PUT')
+
+            def do_DELETE(self):
+                self._dispatch('DELETE')
+
+            def log_message(self, format, *args):
+                pass
+
+        self.http_server = ThreadingHTTPServer((host, port), Handler)
+        self.http_server.daemon_threads = True
+        threading.Thread(target=self.http_server.serve_forever, name='fake-exchange-http', daemon=True).start()
+
+        if ws_port:
+            ready = threading.Event()
+            self.ws_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=self.ws_loop.run_until_complete, args=(self._ws_main(host, ws_port, ready),),
+                name='fake-exchange-ws', daemon=True
+            ).start()
+            ready.wait(timeout=5)
+        return f"http://{host}:{port}", f"ws://{host}:{ws_port}"
+
+    def stop(self):
+        if self.http_server is not None:
+            self.http_server.shutdown()
+            self.http_server.server_close()
+        if self.ws_loop is not None:
+            self.ws_loop.call_soon_threadsafe(self.ws_server.close)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--ws-port', type=int, default=8801)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--weight-limit', type=int, default=6000)
+    parser.add_argument('--partial-fill-rate', type=float, default=0)
+    args = parser.parse_args()
+    exchange = FakeExchange(latency=args.latency_ms / 1000, weight_limit=args.weight_limit,
+                            partial_fill_rate=args.partial_fill_rate)
+    http_url, ws_url = exchange.start(args.host, args.port, args.ws_port)
+    print(f"Fake exchange on {http_url} (REST) and {ws_url} (streams). Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        exchange.stop()
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,13 @@
-import os
-from binance.client import Client
-from dotenv import load_dotenv
-
-# Load API keys from .env file
-load_dotenv('.env')
-API_KEY = os.getenv('BINANCE_API_KEY')
-API_SECRET = os.getenv('BINANCE_API_SECRET')
-
-# Initialize Binance client
-client = Client(API_KEY, API_SECRET)
+from clients import client
+import price_snapshot
+import user_stream
 
 def get_positive_balances(return_balances=False):
     """Fetch and display positive balances from Binance account with USDT equivalent values."""
     try:
         total_usdt_value = 0.0
-        # Retrieve account information
-        account_info = client.get_account()
-        balances = account_info['balances']
+        # Retrieve balances from the user-data stream, or the account endpoint without it
+        balances = user_stream.get_balances(client)
         
         positive_balances = []
         
@@ -24,8 +15,8 @@ def get_positive_balances(return_balances=False):
         print("=" * 60)
         for balance in balances:
             asset = balance['asset']
-            free_amount = float(balance['free'])
-            locked_amount = float(balance['locked'])
+            free_amount = balance['free']
+            locked_amount = balance['locked']
             total_amount = free_amount + locked_amount
             if total_amount > 0:
                 usdt_value = get_usdt_value(asset, total_amount)
@@ -53,8 +44,9 @@ def get_usdt_value(asset, total_amount):
         return total_amount
     symbol = f"{asset}USDT"
     try:
-        ticker = client.get_symbol_ticker(symbol=symbol)
-        price = float(ticker['price'])
+        price = price_snapshot.get_price(client, symbol)
+        if price is None:
+            return 0.0
         return total_amount * price
     except Exception:
         return 0.0
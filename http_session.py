@@ -0,0 +1,108 @@
+"""
+Shared, pooled HTTP session for non-Binance traffic (Telegram, CoinGecko).
+Connections are kept alive between calls, every request gets a timeout, and
+transient failures are retried with backoff. Each request's duration is
+recorded together with whether it had to open a new connection, so the cost of
+TCP/TLS handshakes is visible.
+"""
+import os
+import time
+import threading
+from collections import deque
+from urllib.parse import urlparse
+import config
+import metrics
+
+# Connect and read timeouts in seconds
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 15))
+# Kept-alive connections per host
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 4))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 3))
+HTTP_BACKOFF = 0.5
+
+# Number of recent request timings kept
+TIMINGS_KEPT = 1000
+
+_session = None
+_lock = threading.Lock()
+
+# Recent requests: {'method', 'host', 'status', 'seconds', 'new_connection'}
+timings = deque(maxlen=TIMINGS_KEPT)
+
+def get_session():
+    """Return the shared session, constructing it on first use."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+                retry = Retry(
+                    total=HTTP_RETRIES,
+                    backoff_factor=HTTP_BACKOFF,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                    # Telegram sends are POSTs; a rare duplicate message beats a lost one
+                    allowed_methods=frozenset({'GET', 'POST'}),
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                # pool_block caps concurrent connections per host at HTTP_POOL_SIZE
+                adapter = HTTPAdapter(pool_maxsize=HTTP_POOL_SIZE, pool_block=True, max_retries=retry)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+def _connection_count(session, url):
+    """Connections opened so far by the pools serving url's host."""
+    host = urlparse(url).hostname
+    try:
+        pools = session.get_adapter(url).poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys() if key.key_host == host)
+    except Exception:
+        return 0
+
+def request(method, url, **kwargs):
+    """Send a request on the shared session and record its timing."""
+    session = get_session()
+    kwargs.setdefault('timeout', (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+    opened = _connection_count(session, url)
+    start = time.perf_counter()
+    status = None
+    try:
+        response = session.request(method, url, **kwargs)
+        status = response.status_code
+        return response
+    finally:
+        timing = {
+            'method': method.upper(),
+            'host': urlparse(url).netloc,
+            'status': status,
+            'seconds': time.perf_counter() - start,
+            'new_connection': _connection_count(session, url) > opened,
+        }
+        timings.append(timing)
+        metrics.registry.observe('http_request_seconds', timing['seconds'], host=timing['host'])
+        if timing['new_connection']:
+            metrics.registry.inc('http_new_connections_total', host=timing['host'])
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+def summary():
+    """Per-host request count, mean duration and new connections among recent requests."""
+    hosts = {}
+    for timing in list(timings):
+        entry = hosts.setdefault(timing['host'], {'requests': 0, 'seconds': 0.0, 'new_connections': 0})
+        entry['requests'] += 1
+        entry['seconds'] += timing['seconds']
+        entry['new_connections'] += timing['new_connection']
+    for entry in hosts.values():
+        entry['mean_ms'] = entry.pop('seconds') / entry['requests'] * 1000
+    return hosts
@@ -0,0 +1,307 @@
+"""
+Append-only trade and portfolio journal in SQLite (WAL mode).
+
+Every order with its fills, fees, expected price and slippage, and the
+portfolio value at the start and end of every cycle, are recorded in
+JOURNAL_PATH. record_* calls only enqueue; a background thread writes the
+rows in batched transactions, so the trading path never waits on the disk.
+Readers use their own connection, which WAL lets run alongside the writer.
+The queries behind the Telegram summary (per-symbol PnL, drawdown, slippage
+over any time range) are served by indexes on (mode, time) and (mode,
+symbol, time).
+"""
+import os
+import json
+import time
+import queue
+import atexit
+import sqlite3
+import threading
+import config
+import metrics
+import paper
+import price_snapshot
+import symbol_filters
+from clients import client
+
+JOURNAL_PATH = os.getenv('JOURNAL_PATH', 'journal.db')
+# How long exit waits for queued rows to be written
+JOURNAL_FLUSH_TIMEOUT = 10
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS orders ("
+    "id INTEGER PRIMARY KEY, time_ms INTEGER NOT NULL, mode TEXT NOT NULL, cycle_ms INTEGER, "
+    "symbol TEXT NOT NULL, side TEXT NOT NULL, order_id INTEGER, status TEXT, "
+    "quantity REAL, quote_quantity REAL, price REAL, fee_usdt REAL, "
+    "expected_price REAL, slippage_bps REAL, latency_seconds REAL)",
+    "CREATE TABLE IF NOT EXISTS fills ("
+    "order_row INTEGER NOT NULL REFERENCES orders(id), price REAL, quantity REAL, "
+    "commission REAL, commission_asset TEXT)",
+    "CREATE TABLE IF NOT EXISTS valuations ("
+    "time_ms INTEGER NOT NULL, mode TEXT NOT NULL, cycle_ms INTEGER, stage TEXT NOT NULL, "
+    "usdt_value REAL NOT NULL, balances TEXT)",
+    "CREATE INDEX IF NOT EXISTS orders_by_time ON orders (mode, time_ms)",
+    "CREATE INDEX IF NOT EXISTS orders_by_symbol ON orders (mode, symbol, time_ms)",
+    "CREATE INDEX IF NOT EXISTS fills_by_order ON fills (order_row)",
+    "CREATE INDEX IF NOT EXISTS valuations_by_time ON valuations (mode, stage, time_ms)",
+]
+
+def connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL with NORMAL sync survives a process crash; only a power cut can lose the last commits
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def base_asset(symbol):
+    return symbol[:-len('USDT')] if symbol.endswith('USDT') else None
+
+def fee_in_usdt(order, prices=None):
+    """
+    Trading fee of an order in USDT, from its fills. Fees paid in the base
+    asset are valued at the fill price, fees in other assets (usually BNB)
+    at their USDT price in `prices`; an asset with no price is not counted.
+    When the fills cover only part of the executed quantity (a partial first
+    response), the fee is scaled up to the whole order.
+    """
+    fills = order.get('fills') or []
+    fill_qty = sum(float(fill['qty']) for fill in fills)
+    if not fill_qty:
+        return None
+    base = base_asset(order['symbol'])
+    fee = 0.0
+    for fill in fills:
+        commission = float(fill['commission'])
+        asset = fill['commissionAsset']
+        if asset == 'USDT':
+            fee += commission
+        elif asset == base:
+            fee += commission * float(fill['price'])
+        elif prices and prices.get(f"{asset}USDT") is not None:
+            fee += commission * prices[f"{asset}USDT"]
+    return fee * float(order.get('executedQty') or fill_qty) / fill_qty
+
+def fee_prices(order):
+    """Price snapshot for valuing fees paid in a third asset such as BNB; None when the order has none."""
+    assets = {fill['commissionAsset'] for fill in order.get('fills') or []}
+    if not assets - {'USDT', base_asset(order['symbol'])}:
+        return None
+    try:
+        return price_snapshot.snapshot.get_prices(client)
+    except Exception as e:
+        print(f"Error fetching prices to value fees in the trade journal: {e}")
+        return None
+
+class Journal:
+    """Queue-fed SQLite writer plus the read queries used by the summary."""
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self.queue = queue.Queue()
+        self.worker = None
+        self.reader = None
+        self.cycle_ms = None
+        self.lock = threading.Lock()
+
+    def _start(self):
+        with self.lock:
+            if self.worker is None:
+                conn = connect(self.path)
+                with conn:
+                    for statement in SCHEMA:
+                        conn.execute(statement)
+                self.worker = threading.Thread(target=self._run, args=(conn,), name='journal-writer', daemon=True)
+                self.worker.start()
+                atexit.register(self.flush)
+
+    def _run(self, conn):
+        while True:
+            # Write everything queued so far in one transaction
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    for write, args in batch:
+                        write(conn, *args)
+            except Exception as e:
+                print(f"Error writing to the trade journal: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _enqueue(self, write, *args):
+        self._start()
+        self.queue.put((write, args))
+
+    def start_cycle(self):
+        """Tag the rows recorded from now on with a new cycle's start time."""
+        self.cycle_ms = int(time.time() * 1000)
+        return self.cycle_ms
+
+    def record_order(self, order, expected_price=None, latency=None):
+        """Queue an order and its fills for writing; returns immediately."""
+        self._enqueue(self._write_order, dict(order), expected_price, latency, paper.TRADING_MODE, self.cycle_ms)
+
+    def record_valuation(self, stage, usdt_value, balances=None):
+        """Queue the portfolio value at a stage of the cycle ('start' or 'end')."""
+        self._enqueue(self._write_valuation, int(time.time() * 1000), stage, usdt_value, balances,
+                      paper.TRADING_MODE, self.cycle_ms)
+
+    def _write_order(self, conn, order, expected_price, latency, mode, cycle_ms):
+        executed = float(order.get('executedQty') or 0)
+        quote = float(order.get('cummulativeQuoteQty') or 0)
+        cursor = conn.execute(
+            "INSERT INTO orders (time_ms, mode, cycle_ms, symbol, side, order_id, status, quantity, quote_quantity, "
+            "price, fee_usdt, expected_price, slippage_bps, latency_seconds) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (order.get('updateTime') or order.get('transactTime') or int(time.time() * 1000), mode, cycle_ms,
+             order['symbol'], order['side'], order.get('orderId'), order.get('status'), executed, quote,
+             quote / executed if executed else None, fee_in_usdt(order, fee_prices(order)), expected_price,
+             metrics.slippage_bps(order, expected_price), latency)
+        )
+        conn.executemany(
+            "INSERT INTO fills VALUES (?, ?, ?, ?, ?)",
+            [(cursor.lastrowid, float(fill['price']), float(fill['qty']), float(fill['commission']),
+              fill['commissionAsset']) for fill in order.get('fills') or []]
+        )
+
+    def _write_valuation(self, conn, time_ms, stage, usdt_value, balances, mode, cycle_ms):
+        conn.execute(
+            "INSERT INTO valuations VALUES (?, ?, ?, ?, ?, ?)",
+            (time_ms, mode, cycle_ms, stage, usdt_value, json.dumps(balances) if balances is not None else None)
+        )
+
+    def flush(self, timeout=JOURNAL_FLUSH_TIMEOUT):
+        """Wait until every queued row is written or the timeout expires. Returns True when drained."""
+        deadline = time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    # Queries; every range is [start_ms, end_ms] on the record time, open-ended when None
+
+    def _query(self, sql, params):
+        self._start()
+        with self.lock:
+            if self.reader is None:
+                self.reader = connect(self.path)
+            return self.reader.execute(sql, params).fetchall()
+
+    def _range(self, start_ms, end_ms, mode):
+        return (mode or paper.TRADING_MODE, start_ms or 0, end_ms if end_ms is not None else 2 ** 62)
+
+    def symbol_pnl(self, start_ms=None, end_ms=None, mode=None):
+        """
+        Realized PnL per symbol in USDT over the range. Each sell is paired
+        with the average cost of the buys since the symbol was last sold out,
+        that is, since a sell left less than one step size (the dust that is
+        swept to BNB), so earlier round trips do not leak into later ones.
+        Bought quantities are net of fees paid in the base asset. Returns
+        {symbol: (pnl, sold quote, fees)} for every symbol sold in the range,
+        with the sell fees plus the buy fees of the quantity sold; pnl is None
+        when a sell exceeds the journaled buys (holdings from before the
+        journal).
+        """
+        mode, start_ms, end_ms = self._range(start_ms, end_ms, mode)
+        # Round trips can start before the range, so replay each symbol's history up to its end.
+        # The base-asset commission is scaled to the whole order when the fills cover only part of it.
+        rows = self._query(
+            "SELECT symbol, time_ms, side, quantity, quote_quantity, COALESCE(fee_usdt, 0), "
+            "COALESCE((SELECT SUM(CASE WHEN commission_asset = substr(symbol, 1, length(symbol) - 4) "
+            "THEN commission ELSE 0 END) / SUM(quantity) FROM fills WHERE order_row = orders.id), 0) * quantity "
+            "FROM orders WHERE mode = ? AND time_ms <= ? AND quantity > 0 ORDER BY symbol, time_ms, id",
+            (mode, end_ms)
+        )
+        steps = {}
+        positions = {}
+        result = {}
+        for symbol, time_ms, side, quantity, quote, fee, base_fee in rows:
+            # (quantity held, cost, buy fees, buy fees not already taken out of the quantity)
+            held, cost, buy_fees, cost_fees = positions.pop(symbol, (0.0, 0.0, 0.0, 0.0))
+            if side == 'BUY':
+                positions[symbol] = (held + quantity - base_fee, cost + quote, buy_fees + fee,
+                                     cost_fees + fee - base_fee * quote / quantity)
+                continue
+            fraction = min(1.0, quantity / held) if held > 0 else 1.0
+            trade_fees = buy_fees * fraction + fee
+            trade_pnl = quote - (cost + cost_fees) * fraction - fee if quantity <= held * (1 + 1e-9) else None
+            if symbol not in steps:
+                steps[symbol] = self._step_size(symbol)
+            if held - quantity >= steps[symbol]:
+                positions[symbol] = (held - quantity, cost * (1 - fraction), buy_fees * (1 - fraction),
+                                     cost_fees * (1 - fraction))
+            if time_ms >= start_ms:
+                pnl, sold_quote, fees = result.get(symbol, (0.0, 0.0, 0.0))
+                result[symbol] = (pnl + trade_pnl if pnl is not None and trade_pnl is not None else None,
+                                  sold_quote + quote, fees + trade_fees)
+        return result
+
+    def _step_size(self, symbol):
+        """Step size of a symbol from the shared filter index; 0 when it is unknown (e.g. delisted)."""
+        try:
+            filters = symbol_filters.index.get(client, symbol)
+        except Exception as e:
+            print(f"Error fetching the step size of {symbol} for the trade journal: {e}")
+            return 0.0
+        return (filters or {}).get('step_size') or 0.0
+
+    def drawdown(self, start_ms=None, end_ms=None, mode=None):
+        """Maximum drawdown of the end-of-cycle portfolio value over the range, in percent (<= 0)."""
+        mode, start_ms, end_ms = self._range(start_ms, end_ms, mode)
+        rows = self._query(
+            "SELECT MIN(usdt_value / peak - 1) * 100 FROM (SELECT usdt_value, "
+            "MAX(usdt_value) OVER (ORDER BY time_ms ROWS UNBOUNDED PRECEDING) AS peak FROM valuations "
+            "WHERE mode = ? AND stage = 'end' AND time_ms BETWEEN ? AND ?) WHERE peak > 0",
+            (mode, start_ms, end_ms)
+        )
+        return rows[0][0] or 0.0
+
+    def slippage(self, start_ms=None, end_ms=None, symbol=None, mode=None):
+        """Fill slippage per side over the range: {side: (orders, mean bps, worst bps)}."""
+        mode, start_ms, end_ms = self._range(start_ms, end_ms, mode)
+        sql = ("SELECT side, COUNT(slippage_bps), AVG(slippage_bps), MAX(slippage_bps) FROM orders "
+               "WHERE mode = ? AND time_ms BETWEEN ? AND ? AND slippage_bps IS NOT NULL")
+        params = [mode, start_ms, end_ms]
+        if symbol is not None:
+            sql += " AND symbol = ?"
+            params.append(symbol)
+        rows = self._query(sql + " GROUP BY side", params)
+        return {side: (count, mean, worst) for side, count, mean, worst in rows}
+
+    def cumulative(self, mode=None):
+        """All-time totals for the summary: cycles, first and latest value, fees, drawdown and slippage."""
+        mode = mode or paper.TRADING_MODE
+        (cycles, first_ms), = self._query(
+            "SELECT COUNT(*), MIN(time_ms) FROM valuations WHERE mode = ? AND stage = 'end'", (mode,)
+        )
+        if not cycles:
+            return None
+        first_value = self._query(
+            "SELECT usdt_value FROM valuations WHERE mode = ? AND stage = 'start' ORDER BY time_ms LIMIT 1", (mode,)
+        )
+        latest_value = self._query(
+            "SELECT usdt_value FROM valuations WHERE mode = ? AND stage = 'end' ORDER BY time_ms DESC LIMIT 1", (mode,)
+        )
+        (orders, fees), = self._query(
+            "SELECT COUNT(*), COALESCE(SUM(fee_usdt), 0) FROM orders WHERE mode = ?", (mode,)
+        )
+        slippage = self.slippage(mode=mode)
+        slipped = sum(count for count, _, _ in slippage.values())
+        return {
+            'since_ms': first_ms,
+            'cycles': cycles,
+            'orders': orders,
+            'first_value': first_value[0][0] if first_value else None,
+            'latest_value': latest_value[0][0],
+            'fees': fees,
+            'max_drawdown': self.drawdown(mode=mode),
+            'mean_slippage_bps': sum(count * mean for count, mean, _ in slippage.values()) / slipped if slipped else None,
+        }
+
+# Shared journal written by the order path and read by the summary
+trade_journal = Journal()
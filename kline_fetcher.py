@@ -0,0 +1,40 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import config
+
+# Number of symbols fetched in parallel
+KLINE_FETCH_WORKERS = int(os.getenv('KLINE_FETCH_WORKERS', 8))
+
+def fetch_symbol_klines(client, symbol, interval, start_str, since=None):
+    """
+    Fetch klines for one symbol, returning the data or the error raised.
+    When `since` (an open time in ms) is given, only candles from that open
+    time onwards are requested in a single page. Requests are paced by the
+    client's rate_limit.request_scheduler.
+    """
+    try:
+        if since is not None:
+            klines = client.get_klines(symbol=symbol, interval=interval, startTime=since, limit=1000)
+        else:
+            klines = client.get_historical_klines(symbol, interval, start_str)
+        return {'symbol': symbol, 'klines': klines, 'error': None}
+    except Exception as e:
+        return {'symbol': symbol, 'klines': None, 'error': e}
+
+def fetch_klines(client, symbols, interval, start_str, max_workers=None, since=None):
+    """
+    Fetch historical klines for many symbols with bounded concurrency.
+    `since` optionally maps symbols to the open time to resume from.
+    Returns a list of dictionaries with symbol, klines and error, in the same
+    order as the input symbols.
+    """
+    symbols = list(symbols)
+    if not symbols:
+        return []
+    since = since or {}
+    max_workers = max_workers or KLINE_FETCH_WORKERS
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as executor:
+        return list(executor.map(
+            lambda symbol: fetch_symbol_klines(client, symbol, interval, start_str, since.get(symbol)),
+            symbols
+        ))
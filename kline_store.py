@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import threading
+import config
+import kline_fetcher
+
+KLINE_STORE_PATH = os.getenv('KLINE_STORE_PATH', 'klines.db')
+
+# Column order matches the kline lists returned by Binance (minus the unused last field)
+COLUMNS = [
+    'open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time',
+    'quote_volume', 'trades', 'taker_base_volume', 'taker_quote_volume'
+]
+
+class KlineStore:
+    """SQLite-backed kline cache keyed by (symbol, interval, open time)."""
+    def __init__(self, path=KLINE_STORE_PATH):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS klines ("
+                "symbol TEXT NOT NULL, interval TEXT NOT NULL, "
+                "open_time INTEGER NOT NULL, open REAL, high REAL, low REAL, close REAL, "
+                "volume REAL, close_time INTEGER, quote_volume REAL, trades INTEGER, "
+                "taker_base_volume REAL, taker_quote_volume REAL, "
+                "PRIMARY KEY (symbol, interval, open_time)) WITHOUT ROWID"
+            )
+
+    def last_open_times(self, interval):
+        """Return the latest stored open time per symbol for an interval."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT symbol, MAX(open_time) FROM klines WHERE interval = ? GROUP BY symbol",
+                (interval,)
+            ).fetchall()
+        return dict(rows)
+
+    def save(self, symbol, interval, klines):
+        """Insert or overwrite klines; the last candle is replaced as it closes."""
+        rows = [
+            (symbol, interval, int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]),
+             float(k[5]), int(k[6]), float(k[7]), int(k[8]), float(k[9]), float(k[10]))
+            for k in klines
+        ]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO klines VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def load(self, symbol, interval, start_ms, end_ms=None):
+        """Return stored klines with open time in [start_ms, end_ms], oldest first."""
+        query = f"SELECT {', '.join(COLUMNS)} FROM klines WHERE symbol = ? AND interval = ? AND open_time >= ?"
+        params = [symbol, interval, start_ms]
+        if end_ms is not None:
+            query += " AND open_time <= ?"
+            params.append(end_ms)
+        with self.lock:
+            rows = self.conn.execute(query + " ORDER BY open_time", params).fetchall()
+        return [list(row) for row in rows]
+
+    def load_closes(self, interval, start_ms=0, end_ms=None):
+        """Return every stored (symbol, open_time, close) row for an interval, ordered by open time."""
+        query = "SELECT symbol, open_time, close FROM klines WHERE interval = ? AND open_time >= ?"
+        params = [interval, start_ms]
+        if end_ms is not None:
+            query += " AND open_time <= ?"
+            params.append(end_ms)
+        with self.lock:
+            return self.conn.execute(query + " ORDER BY open_time", params).fetchall()
+
+    def prune(self, interval, before_ms):
+        """Delete an interval's klines opened before before_ms. Returns how many were deleted."""
+        with self.lock, self.conn:
+            return self.conn.execute(
+                "DELETE FROM klines WHERE interval = ? AND open_time < ?", (interval, before_ms)
+            ).rowcount
+
+_store = None
+
+def get_store():
+    """Return the shared kline store, opening it on first use."""
+    global _store
+    if _store is None:
+        _store = KlineStore()
+    return _store
+
+def load_klines(client, symbols, interval, start_ms, store=None):
+    """
+    Return klines from start_ms onwards for each symbol, downloading only
+    candles newer than the last stored open time.
+    Same result format and ordering as kline_fetcher.fetch_klines.
+    """
+    store = store or get_store()
+    symbols = list(symbols)
+    last_open_times = store.last_open_times(interval)
+
+    # Resume from the last stored candle, which may still have been open when saved
+    since = {
+        symbol: last_open_times[symbol]
+        for symbol in symbols
+        if last_open_times.get(symbol, -1) >= start_ms
+    }
+    results = kline_fetcher.fetch_klines(client, symbols, interval, start_ms, since=since)
+
+    for result in results:
+        if result['error'] is not None:
+            continue
+        try:
+            store.save(result['symbol'], interval, result['klines'])
+            result['klines'] = store.load(result['symbol'], interval, start_ms)
+        except Exception as e:
+            result['klines'], result['error'] = None, e
+    return results
@@ -0,0 +1,126 @@
+"""
+Streaming log pipeline for the bot.
+
+Printed output is turned into log records line by line as it is written, with
+lines starting with "Error" or "An error" logged at ERROR level. Records go
+through a queue to a background listener thread. That thread writes the
+rotated log file and the console, and keeps the most recent errors in a
+bounded ring buffer for the Telegram alert. Nothing is held beyond the ring
+buffer and the current partial line.
+"""
+import os
+import sys
+import queue
+import atexit
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import config
+
+LOG_PATH = os.getenv('BOT_LOG_PATH', 'bot.log')
+LOG_MAX_BYTES = int(os.getenv('BOT_LOG_MAX_BYTES', 5 * 1024 * 1024))
+LOG_BACKUPS = int(os.getenv('BOT_LOG_BACKUPS', 5))
+# Most recent errors kept for the end-of-cycle alert
+ERROR_BUFFER_SIZE = int(os.getenv('ERROR_BUFFER_SIZE', 50))
+
+# Printed lines with these prefixes are errors
+ERROR_PREFIXES = ('Error', 'An error')
+
+logger = logging.getLogger('bot')
+
+class ErrorBuffer(logging.Handler):
+    """Keeps the messages of the most recent ERROR records in a ring buffer."""
+    def __init__(self, capacity=ERROR_BUFFER_SIZE):
+        super().__init__(level=logging.ERROR)
+        self.records = deque(maxlen=capacity)
+        self.dropped = 0
+
+    def emit(self, record):
+        with self.lock:
+            if len(self.records) == self.records.maxlen:
+                self.dropped += 1
+            self.records.append(record.getMessage())
+
+    def drain(self):
+        """Return the buffered errors, oldest first, and empty the buffer."""
+        with self.lock:
+            lines = list(self.records)
+            if self.dropped:
+                lines.insert(0, f"... {self.dropped} earlier errors not shown")
+            self.records.clear()
+            self.dropped = 0
+        return lines
+
+class PrintToLog:
+    """File-like stand-in for sys.stdout that logs every complete printed line."""
+    def __init__(self, target=logger):
+        self.target = target
+        self.partial = threading.local()
+
+    def write(self, text):
+        pending = getattr(self.partial, 'text', '') + text
+        *lines, self.partial.text = pending.split('\n')
+        for line in lines:
+            level = logging.ERROR if line.lstrip().startswith(ERROR_PREFIXES) else logging.INFO
+            self.target.log(level, line)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+# Shared ring buffer of recent errors
+error_buffer = ErrorBuffer()
+
+_listener = None
+_queue = None
+
+def setup(path=LOG_PATH, console=None):
+    """Route the 'bot' logger through a queue to the rotated file, console and error buffer."""
+    global _listener, _queue
+    if _listener is not None:
+        return
+    handlers = [error_buffer]
+    if path:
+        file_handler = RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS)
+        file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+        handlers.append(file_handler)
+    # Echo to the terminal when there is one; under cron everything goes to the file
+    if console is None:
+        console = sys.__stdout__.isatty()
+    if console:
+        handlers.append(logging.StreamHandler(sys.__stdout__))
+
+    _queue = queue.Queue()
+    logger.addHandler(QueueHandler(_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    _listener = QueueListener(_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown)
+
+def flush():
+    """Wait until every record logged so far has been handled."""
+    if _queue is not None and _listener is not None:
+        _queue.join()
+
+def shutdown():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+@contextmanager
+def capture_stdout():
+    """Send everything printed inside the block through the log pipeline."""
+    previous = sys.stdout
+    sys.stdout = PrintToLog()
+    try:
+        yield
+    finally:
+        sys.stdout = previous
@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import asyncio
+import threading
+import websockets
+import config
+import kline_store
+
+# Combined stream endpoint; point it at replay_server.py to run offline
+STREAM_URL = os.getenv('MARKET_STREAM_URL', 'wss://stream.binance.com:9443/stream')
+# Optional JSONL file every received frame is appended to, for later replay
+STREAM_RECORD_PATH = os.getenv('MARKET_STREAM_RECORD_PATH')
+
+# Binance accepts at most 1024 streams per connection and 200 per SUBSCRIBE message
+MAX_STREAMS_PER_CONNECTION = 1024
+MAX_STREAMS_PER_SUBSCRIBE = 200
+# Binance disconnects a client sending more than 5 messages per second; keep
+# SUBSCRIBE frames to 4 per second, leaving room for pong frames
+SUBSCRIBE_INTERVAL = 0.25
+RECONNECT_DELAY_MAX = 60
+
+def ticker_from_event(data):
+    """Convert a 24hrTicker stream event to the get_ticker() REST format."""
+    return {
+        'symbol': data['s'],
+        'priceChange': data['p'],
+        'priceChangePercent': data['P'],
+        'lastPrice': data['c'],
+        'openPrice': data['o'],
+        'highPrice': data['h'],
+        'lowPrice': data['l'],
+        'volume': data['v'],
+        'quoteVolume': data['q'],
+        'closeTime': data['C'],
+    }
+
+def kline_from_event(k):
+    """Convert a kline stream payload to the get_klines() REST list format."""
+    return [k['t'], k['o'], k['h'], k['l'], k['c'], k['v'], k['T'], k['q'], k['n'], k['V'], k['Q'], '0']
+
+class MarketStream:
+    """
+    Continuously updated market state fed by the !ticker@arr and kline streams,
+    for one or more kline intervals. Closed candles are written to the kline
+    store. on_kline(symbol, interval, kline), when set, is called with every
+    kline update, the open candle included. Streams are spread over as
+    many connections as Binance's per-connection limit requires.
+    """
+    def __init__(self, symbols, intervals, url=STREAM_URL, store=None, record_path=STREAM_RECORD_PATH):
+        self.symbols = list(symbols)
+        self.intervals = list(intervals)
+        self.url = url
+        self.store = store or kline_store.get_store()
+        self.record_path = record_path
+        self.tickers = {}
+        self.updated_at = 0.0
+        self.on_kline = None
+        self.lock = threading.Lock()
+        self.loop = None
+        self.thread = None
+        self.websockets = set()
+        self.record_file = None
+        self.stopping = False
+
+    def streams(self):
+        return ['!ticker@arr'] + [
+            f"{symbol.lower()}@kline_{interval}" for interval in self.intervals for symbol in self.symbols
+        ]
+
+    def handle_message(self, raw):
+        """Apply one combined-stream frame to the market state."""
+        message = json.loads(raw)
+        if 'stream' not in message:
+            return  # Subscription replies
+        data = message['data']
+        if message['stream'] == '!ticker@arr':
+            with self.lock:
+                for event in data:
+                    self.tickers[event['s']] = ticker_from_event(event)
+                self.updated_at = time.time()
+        elif data.get('e') == 'kline':
+            kline = kline_from_event(data['k'])
+            interval = data['k']['i']
+            if data['k']['x']:
+                # Candle closed: persist it
+                self.store.save(data['s'], interval, [kline])
+            if self.on_kline is not None:
+                self.on_kline(data['s'], interval, kline)
+
+    def get_tickers(self):
+        """Return the latest 24h ticker of every symbol, as client.get_ticker() would."""
+        with self.lock:
+            return list(self.tickers.values())
+
+    async def _subscribe(self, websocket, streams):
+        for i in range(0, len(streams), MAX_STREAMS_PER_SUBSCRIBE):
+            if i:
+                await asyncio.sleep(SUBSCRIBE_INTERVAL)
+            await websocket.send(json.dumps({
+                'method': 'SUBSCRIBE',
+                'params': streams[i:i + MAX_STREAMS_PER_SUBSCRIBE],
+                'id': i // MAX_STREAMS_PER_SUBSCRIBE + 1
+            }))
+
+    async def _run_connection(self, streams):
+        """Keep one connection subscribed to its share of the streams, reconnecting with backoff."""
+        delay = 1
+        while not self.stopping:
+            try:
+                async with websockets.connect(self.url, max_size=None) as websocket:
+                    self.websockets.add(websocket)
+                    try:
+                        await self._subscribe(websocket, streams)
+                        delay = 1
+                        async for raw in websocket:
+                            if self.record_file:
+                                self.record_file.write(raw.rstrip('\n') + '\n')
+                            self.handle_message(raw)
+                    finally:
+                        self.websockets.discard(websocket)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in market stream: {e}. Reconnecting in {delay}s.")
+            if not self.stopping:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_DELAY_MAX)
+
+    async def _run(self):
+        self.record_file = open(self.record_path, 'a') if self.record_path else None
+        try:
+            streams = self.streams()
+            await asyncio.gather(*(
+                self._run_connection(streams[i:i + MAX_STREAMS_PER_CONNECTION])
+                for i in range(0, len(streams), MAX_STREAMS_PER_CONNECTION)
+            ))
+        finally:
+            if self.record_file:
+                self.record_file.close()
+                self.record_file = None
+
+    def start(self):
+        """Run the stream on a background thread."""
+        self.stopping = False
+        self.loop = asyncio.new_event_loop()
+        self.task = self.loop.create_task(self._run())
+        self.thread = threading.Thread(target=self._thread_main, name='market-stream', daemon=True)
+        self.thread.start()
+
+    def _thread_main(self):
+        try:
+            self.loop.run_until_complete(self.task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.loop.close()
+
+    def wait_until_ready(self, timeout=10):
+        """Block until the first ticker frame has arrived."""
+        deadline = time.monotonic() + timeout
+        while not self.tickers and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return bool(self.tickers)
+
+    def stop(self):
+        """Close the connection and wait for the background thread to exit."""
+        self.stopping = True
+        if self.loop is None:
+            return
+        if self.websockets:
+            # A clean close ends the receive loops; cancel only if that hangs
+            for websocket in list(self.websockets):
+                asyncio.run_coroutine_threadsafe(websocket.close(), self.loop)
+            self.thread.join(timeout=5)
+        if self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.task.cancel)
+            self.thread.join(timeout=5)
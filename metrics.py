@@ -0,0 +1,201 @@
+"""
+In-process instrumentation for the bot's hot path: per-phase spans, REST
+latency histograms per endpoint, request-weight usage and order fill slippage.
+
+Metrics can be scraped in Prometheus text format from a local HTTP endpoint
+(METRICS_PORT) and/or appended once per cycle to a JSONL file (METRICS_JSONL).
+"""
+import os
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+import config
+
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))  # 0 disables the endpoint
+METRICS_JSONL = os.getenv('METRICS_JSONL')
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+SLIPPAGE_BUCKETS = [-100, -50, -20, -10, -5, -2, 0, 2, 5, 10, 20, 50, 100]
+
+# Help text and type of every metric
+METRICS = {
+    'bot_phase_seconds': ('histogram', 'Wall-clock time of each bot cycle phase', LATENCY_BUCKETS),
+    'binance_request_seconds': ('histogram', 'Binance REST latency by endpoint', LATENCY_BUCKETS),
+    'binance_requests_total': ('counter', 'Binance REST responses by endpoint and status', None),
+    'binance_used_weight': ('gauge', 'Request weight used in the current minute, as reported by Binance', None),
+    'http_request_seconds': ('histogram', 'Non-Binance HTTP latency by host', LATENCY_BUCKETS),
+    'http_new_connections_total': ('counter', 'Non-Binance HTTP requests that opened a new connection', None),
+    'order_fill_seconds': ('histogram', 'Order submit-to-final-status latency', LATENCY_BUCKETS),
+    'order_slippage_bps': ('histogram', 'Fill price versus the expected price in basis points, positive is adverse', SLIPPAGE_BUCKETS),
+}
+
+class Histogram:
+    """Cumulative-bucket histogram with a running sum and count."""
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """(upper bound, cumulative count) pairs ending with +Inf."""
+        total, result = 0, []
+        for bound, count in zip(self.buckets + [float('inf')], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+class Registry:
+    """Thread-safe store of labelled counters, gauges and histograms, plus the current cycle's spans."""
+    def __init__(self):
+        self.values = {}
+        self.spans = []
+        self.lock = threading.Lock()
+
+    def _key(self, name, labels):
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        with self.lock:
+            key = self._key(name, labels)
+            self.values[key] = self.values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.values[self._key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        with self.lock:
+            key = self._key(name, labels)
+            if key not in self.values:
+                self.values[key] = Histogram(METRICS[name][2])
+            self.values[key].observe(value)
+
+    @contextmanager
+    def span(self, phase):
+        """Time a block as one phase of the current cycle."""
+        start = time.perf_counter()
+        started_at = time.time()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe('bot_phase_seconds', seconds, phase=phase)
+            with self.lock:
+                self.spans.append({'phase': phase, 'start': started_at, 'seconds': seconds})
+
+    def reset_spans(self):
+        with self.lock:
+            self.spans = []
+
+    def render_prometheus(self):
+        """Render every metric in the Prometheus text exposition format."""
+        with self.lock:
+            items = sorted(self.values.items(), key=lambda item: item[0])
+            lines = []
+            for name, (kind, help_text, _) in METRICS.items():
+                series = [(labels, value) for (key, labels), value in items if key == name]
+                if not series:
+                    continue
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in series:
+                    if isinstance(value, Histogram):
+                        for bound, count in value.cumulative():
+                            le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                            lines.append(f"{name}_bucket{format_labels(labels + (('le', le),))} {count}")
+                        lines.append(f"{name}_sum{format_labels(labels)} {value.sum:.6f}")
+                        lines.append(f"{name}_count{format_labels(labels)} {value.count}")
+                    else:
+                        lines.append(f"{name}{format_labels(labels)} {value:g}")
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """JSON-friendly view: the cycle's spans plus every metric's current value."""
+        with self.lock:
+            metrics = []
+            for (name, labels), value in sorted(self.values.items(), key=lambda item: item[0]):
+                entry = {'name': name, 'labels': dict(labels)}
+                if isinstance(value, Histogram):
+                    entry.update(count=value.count, sum=value.sum, buckets=[
+                        [bound if bound != float('inf') else '+Inf', count] for bound, count in value.cumulative()
+                    ])
+                else:
+                    entry['value'] = value
+                metrics.append(entry)
+            return {'time': time.time(), 'spans': list(self.spans), 'metrics': metrics}
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+# Shared registry used by every module
+registry = Registry()
+
+def on_binance_response(response, *args, **kwargs):
+    """requests response hook on the Binance client's session: latency, status and weight."""
+    from urllib.parse import urlparse
+    endpoint = f"{response.request.method} {urlparse(response.request.url).path}"
+    registry.observe('binance_request_seconds', response.elapsed.total_seconds(), endpoint=endpoint)
+    registry.inc('binance_requests_total', endpoint=endpoint, status=response.status_code)
+    used = response.headers.get('X-MBX-USED-WEIGHT-1M')
+    if used:
+        registry.set('binance_used_weight', int(used))
+
+def slippage_bps(order, expected_price):
+    """Average fill price versus the expected price, in basis points; positive means a worse fill."""
+    executed = float(order.get('executedQty') or 0)
+    if not expected_price or executed <= 0:
+        return None
+    fill_price = float(order['cummulativeQuoteQty']) / executed
+    slippage = (fill_price / expected_price - 1) * 10000
+    return slippage if order['side'] == 'BUY' else -slippage
+
+def write_jsonl(path=None):
+    """Append the current snapshot as one JSON line, when a path is configured."""
+    path = path or METRICS_JSONL
+    if not path:
+        return
+    try:
+        with open(path, 'a') as f:
+            f.write(json.dumps(registry.snapshot()) + '\n')
+    except OSError as e:
+        print(f"Error writing metrics to {path}: {e}")
+
+_server = None
+
+def start_server(port=None):
+    """Serve /metrics in Prometheus text format on a daemon thread, when a port is configured."""
+    global _server
+    port = port or METRICS_PORT
+    if not port or _server is not None:
+        return
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            payload = registry.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    _server = ThreadingHTTPServer(('localhost', port), Handler)
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name='metrics-http', daemon=True).start()
@@ -0,0 +1,58 @@
+import numpy as np
+
+def volume_weighted_return(closes, volumes):
+    """Average daily return in percent, weighted by each day's quote volume."""
+    returns = np.diff(closes, axis=1) / closes[:, :-1]
+    weights = volumes[:, 1:]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (returns * weights).sum(axis=1) / weights.sum(axis=1) * 100
+
+def volatility_adjusted_momentum(closes, volumes):
+    """Window return divided by the volatility of daily returns over the window."""
+    returns = np.diff(closes, axis=1) / closes[:, :-1]
+    total_return = closes[:, -1] / closes[:, 0] - 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return total_return / (returns.std(axis=1) * np.sqrt(returns.shape[1]))
+
+# Extra factors computed alongside the weekly change, by name
+FACTORS = {
+    'volume_weighted_return': volume_weighted_return,
+    'volatility_adjusted_momentum': volatility_adjusted_momentum,
+}
+
+def build_matrices(kline_lists, days):
+    """
+    Stack the last `days` close prices and quote volumes of each symbol into
+    (symbols x days) float64 matrices. Symbols with fewer candles get NaN rows.
+    """
+    closes = np.full((len(kline_lists), days), np.nan)
+    volumes = np.full((len(kline_lists), days), np.nan)
+    valid = [i for i, klines in enumerate(kline_lists) if klines is not None and len(klines) >= days]
+    if valid:
+        # Parse every (close, quote volume) pair in a single conversion
+        pairs = [(k[4], k[7]) for i in valid for k in kline_lists[i][-days:]]
+        window = np.array(pairs, dtype=np.float64).reshape(len(valid), days, 2)
+        closes[valid] = window[:, :, 0]
+        volumes[valid] = window[:, :, 1]
+    return closes, volumes
+
+def score(closes, volumes, change_24h, min_week_change=30, factors=None):
+    """
+    Score every symbol in one vectorized pass.
+    Returns the row indices passing the positive 24h and weekly gain filters,
+    sorted by weekly change descending, plus a dictionary of per-row columns
+    (weekly change and each requested factor).
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        week_change = (closes[:, -1] - closes[:, 0]) / closes[:, 0] * 100
+    columns = {'week_price_change_percent': week_change}
+    for name in factors if factors is not None else FACTORS:
+        columns[name] = FACTORS[name](closes, volumes)
+
+    # Filter for positive 24h gains and more than the weekly threshold
+    # (NaN rows compare False and drop out)
+    selected = np.flatnonzero((change_24h > 0) & (week_change > min_week_change))
+
+    # Sort by 7-day price change
+    order = np.argsort(-week_change[selected], kind='stable')
+    return selected[order], columns
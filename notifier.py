@@ -0,0 +1,157 @@
+"""
+Background Telegram notifications.
+
+send() only enqueues, so a cycle never waits on Telegram. A worker thread
+coalesces messages queued close together into as few sendMessage calls as
+fit in Telegram's 4096-character limit. It splits longer reports on line
+boundaries while keeping ``` code blocks balanced, and retries failures with
+backoff. A message Telegram cannot parse as Markdown is resent as plain text.
+"""
+import os
+import time
+import queue
+import atexit
+import threading
+import config
+import http_session
+import scheduler
+
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
+TELEGRAM_MAX_LENGTH = 4096
+# Messages queued within this many seconds of each other are sent together
+NOTIFY_BATCH_WINDOW = float(os.getenv('NOTIFY_BATCH_WINDOW', 1))
+NOTIFY_RETRIES = int(os.getenv('NOTIFY_RETRIES', 5))
+# How long exit waits for queued messages to go out
+NOTIFY_FLUSH_TIMEOUT = float(os.getenv('NOTIFY_FLUSH_TIMEOUT', 30))
+
+CODE_FENCE = '```'
+
+def split_message(text, limit=TELEGRAM_MAX_LENGTH):
+    """Split text into chunks of at most limit characters, closing and reopening code blocks at the cuts."""
+    if len(text) <= limit:
+        return [text]
+    fence_room = len(CODE_FENCE) + 1
+    # Content per chunk leaves room for a closing fence; long lines are cut to
+    # fit after a reopening fence
+    width = limit - fence_room
+    piece = width - fence_room - 1
+    lines = []
+    for line in text.split('\n'):
+        lines.extend(line[i:i + piece] for i in range(0, max(len(line), 1), piece))
+
+    chunks, current, in_code = [], [], False
+    size = 0
+    for line in lines:
+        if current and size + len(line) + 1 > width:
+            chunks.append('\n'.join(current + ([CODE_FENCE] if in_code else [])))
+            current = [CODE_FENCE] if in_code else []
+            size = fence_room if in_code else 0
+        current.append(line)
+        size += len(line) + 1
+        if line.startswith(CODE_FENCE):
+            in_code = not in_code
+    if current:
+        chunks.append('\n'.join(current))
+    return chunks
+
+class TelegramNotifier:
+    """Queue of outgoing Telegram messages drained by a background thread."""
+    def __init__(self, token, chat_id, api_url=TELEGRAM_API_URL, batch_window=NOTIFY_BATCH_WINDOW):
+        self.token = token
+        self.chat_id = chat_id
+        self.api_url = api_url
+        self.batch_window = batch_window
+        self.queue = queue.Queue()
+        self.worker = None
+        self.lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+
+    def send(self, text, parse_mode='Markdown'):
+        """Queue a message; returns immediately."""
+        self._start()
+        self.queue.put((text, parse_mode))
+
+    def _start(self):
+        with self.lock:
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._run, name='telegram-notifier', daemon=True)
+                self.worker.start()
+                atexit.register(self.flush)
+
+    def _next_batch(self):
+        """Block for one message, then coalesce those following it within the batch window."""
+        text, parse_mode = self.queue.get()
+        taken = 1
+        deadline = time.monotonic() + self.batch_window
+        while len(text) < TELEGRAM_MAX_LENGTH:
+            try:
+                next_text, next_mode = self.queue.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            taken += 1
+            if next_mode != parse_mode:
+                # Different formatting cannot share a message; send it as its own batch
+                self._deliver(text, parse_mode)
+                text, parse_mode = next_text, next_mode
+            else:
+                text = f"{text}\n\n{next_text}"
+        return text, parse_mode, taken
+
+    def _run(self):
+        while True:
+            text, parse_mode, taken = self._next_batch()
+            try:
+                self._deliver(text, parse_mode)
+            finally:
+                for _ in range(taken):
+                    self.queue.task_done()
+
+    def _deliver(self, text, parse_mode):
+        for chunk in split_message(text):
+            if self._post(chunk, parse_mode):
+                self.sent += 1
+            else:
+                self.failed += 1
+
+    def _post(self, text, parse_mode):
+        """Send one chunk, retrying with backoff. Returns True once Telegram accepted it."""
+        url = f"{self.api_url}/bot{self.token}/sendMessage"
+        error = None
+        for attempt in range(NOTIFY_RETRIES + 1):
+            payload = {'chat_id': self.chat_id, 'text': text}
+            if parse_mode:
+                payload['parse_mode'] = parse_mode
+            try:
+                response = http_session.post(url, json=payload)
+                if response.ok:
+                    return True
+                description = response.json().get('description', response.text)
+                if response.status_code == 400 and parse_mode and "can't parse entities" in description:
+                    # Unbalanced Markdown in the report: send it as plain text instead
+                    parse_mode = None
+                    continue
+                if response.status_code < 500 and response.status_code != 429:
+                    print(f"Error sending Telegram message: {response.status_code} {description}")
+                    return False
+                error = f"{response.status_code} {description}"
+            except Exception as e:
+                error = e
+            if attempt < NOTIFY_RETRIES:
+                time.sleep(scheduler.backoff_delay(attempt, base=1, cap=30))
+        print(f"Error sending Telegram message after {NOTIFY_RETRIES + 1} attempts: {error}")
+        return False
+
+    def flush(self, timeout=NOTIFY_FLUSH_TIMEOUT):
+        """Wait until every queued message has been handled or the timeout expires. Returns True when drained."""
+        deadline = time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+# Shared notifier for the bot's alerts and summaries
+telegram = TelegramNotifier(os.getenv('TELEGRAM_BOT_TOKEN'), os.getenv('TELEGRAM_CHAT_ID'))
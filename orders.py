@@ -0,0 +1,64 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import config
+import journal
+import metrics
+import user_stream
+
+# Number of orders submitted in parallel
+ORDER_WORKERS = int(os.getenv('ORDER_WORKERS', 5))
+# How long to wait for an order to reach a final status
+ORDER_FILL_TIMEOUT = float(os.getenv('ORDER_FILL_TIMEOUT', 10))
+ORDER_POLL_INTERVAL = 0.25
+
+# Order statuses after which the order will not change any more
+FINAL_STATUSES = {'FILLED', 'CANCELED', 'REJECTED', 'EXPIRED', 'EXPIRED_IN_MATCH'}
+
+def place_order(client, **params):
+    """Place an order; the client's request scheduler keeps it within the order-rate budget."""
+    return client.create_order(**params)
+
+def wait_for_fill(client, order, timeout=ORDER_FILL_TIMEOUT):
+    """
+    Poll an order until it reaches a final status or the timeout expires.
+    Returns the latest order status seen.
+    """
+    deadline = time.monotonic() + timeout
+    if user_stream.is_live():
+        # The fill arrives as an executionReport; also wait for the balance book to reflect it
+        update = user_stream.stream.wait_for_order(order['orderId'], FINAL_STATUSES, timeout)
+        if update is not None:
+            order = {**order, **update}
+    while order.get('status') not in FINAL_STATUSES and time.monotonic() < deadline:
+        time.sleep(ORDER_POLL_INTERVAL)
+        order = client.get_order(symbol=order['symbol'], orderId=order['orderId'])
+    return order
+
+def execute_order(client, expected_price=None, **params):
+    """
+    Place an order and wait for it to reach a final status.
+    Returns the final order and the submit-to-fill latency in seconds.
+    The latency, and the slippage against expected_price when given, are recorded in metrics,
+    and the order is queued for the trade journal.
+    """
+    submitted_at = time.perf_counter()
+    placed = place_order(client, **params)
+    order = wait_for_fill(client, placed)
+    latency = time.perf_counter() - submitted_at
+    metrics.registry.observe('order_fill_seconds', latency, side=params['side'])
+    slippage = metrics.slippage_bps(order, expected_price)
+    if slippage is not None:
+        metrics.registry.observe('order_slippage_bps', slippage, side=params['side'])
+    # Order queries do not return fills; keep the ones from the placement response
+    journal.trade_journal.record_order({'fills': placed.get('fills'), **order}, expected_price, latency)
+    return order, latency
+
+def run_concurrently(func, items, max_workers=None):
+    """Apply func to every item in parallel, returning results in input order."""
+    items = list(items)
+    if not items:
+        return []
+    max_workers = max_workers or ORDER_WORKERS
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
@@ -0,0 +1,246 @@
+"""
+Paper-trading backend: with TRADING_MODE=paper, the shared client's order,
+account and dust calls are answered from a virtual balance ledger instead of
+the exchange.
+
+Market orders are filled by walking the live order book (or whatever
+BINANCE_API_URL serves, e.g. the fake exchange or a replay), with an extra
+adverse slippage and the exchange's trading fee applied. The ledger is saved
+to disk after every change, so a soak test carries its balances from one
+cycle, and one run, to the next. Market data still comes from the exchange.
+"""
+import os
+import json
+import time
+import threading
+import config
+import dust
+import price_snapshot
+import quantize
+import symbol_filters
+
+TRADING_MODE = os.getenv('TRADING_MODE', 'live')  # 'paper' simulates every order
+PAPER_LEDGER_PATH = os.getenv('PAPER_LEDGER_PATH', 'paper_ledger.json')
+# Starting balances of a new ledger, e.g. "USDT=1000,BNB=0.05"
+PAPER_BALANCES = os.getenv('PAPER_BALANCES', 'USDT=1000')
+# Extra adverse slippage on top of walking the book, in basis points
+PAPER_SLIPPAGE_BPS = float(os.getenv('PAPER_SLIPPAGE_BPS', 5))
+PAPER_FEE_RATE = float(os.getenv('PAPER_FEE_RATE', 0.001))
+PAPER_BOOK_DEPTH = int(os.getenv('PAPER_BOOK_DEPTH', 100))
+
+# Dust conversion: balances worth less than this in BTC, converted for a 2% fee
+DUST_MAX_BTC = 0.001
+DUST_FEE_RATE = 0.02
+
+class PaperOrderError(Exception):
+    """Order rejected by the paper ledger, with the exchange's error code."""
+    def __init__(self, code, message):
+        super().__init__(f"APIError(code={code}): {message}")
+        self.code = code
+        self.message = message
+
+def parse_balances(text):
+    """Parse "ASSET=amount,..." into a balance dictionary."""
+    balances = {}
+    for item in text.split(','):
+        if item.strip():
+            asset, amount = item.split('=')
+            balances[asset.strip().upper()] = float(amount)
+    return balances
+
+def walk_book(levels, quantity=None, quote=None):
+    """
+    Fill a market order against (price, quantity) levels, best first, up to
+    a base quantity or a quote amount. Returns the fills as (price, quantity).
+    """
+    fills = []
+    for price, available in levels:
+        if quantity is not None:
+            take = min(available, quantity)
+            quantity -= take
+        else:
+            take = min(available, quote / price)
+            quote -= take * price
+        if take > 0:
+            fills.append((price, take))
+        if (quantity if quantity is not None else quote) <= 1e-12:
+            break
+    return fills
+
+class PaperBroker:
+    """Virtual balance ledger that stands in for the exchange's order, account and dust endpoints."""
+    def __init__(self, path=PAPER_LEDGER_PATH, balances=PAPER_BALANCES, slippage_bps=PAPER_SLIPPAGE_BPS,
+                 fee_rate=PAPER_FEE_RATE):
+        self.path = path
+        self.slippage_bps = slippage_bps
+        self.fee_rate = fee_rate
+        self.balances = parse_balances(balances)
+        self.next_order_id = 1
+        self.orders = {}
+        self.client = None
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Continue the ledger saved by the previous run, if any."""
+        try:
+            with open(self.path) as f:
+                ledger = json.load(f)
+            self.balances = ledger['balances']
+            self.next_order_id = ledger['next_order_id']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'balances': self.balances, 'next_order_id': self.next_order_id}, f)
+        os.replace(tmp_path, self.path)
+
+    def install(self, client):
+        """Answer the client's order, account and dust calls from the ledger."""
+        self.client = client
+        client.create_order = self.create_order
+        client.get_order = self.get_order
+        client.get_account = self.get_account
+        client.get_dust_assets = self.get_dust_assets
+        client.transfer_dust = self.transfer_dust
+
+    def _book_levels(self, symbol, side):
+        """Levels a market order of this side takes from, best first, worsened by the configured slippage."""
+        book = self.client.get_order_book(symbol=symbol, limit=PAPER_BOOK_DEPTH)
+        levels = book['asks'] if side == 'BUY' else book['bids']
+        adverse = 1 + self.slippage_bps / 10000 if side == 'BUY' else 1 - self.slippage_bps / 10000
+        return [(float(price) * adverse, float(qty)) for price, qty in levels]
+
+    def create_order(self, **params):
+        """Fill a MARKET order against the order book and book it in the ledger."""
+        symbol, side = params['symbol'], params['side']
+        if params.get('type', 'MARKET') != 'MARKET':
+            raise PaperOrderError(-1116, "Paper trading only fills MARKET orders.")
+        filters = symbol_filters.get_symbol_filters(self.client, symbol)
+        if filters is None:
+            raise PaperOrderError(-1121, "Invalid symbol.")
+        base, quote = filters['base_asset'], filters['quote_asset']
+
+        levels = self._book_levels(symbol, side)
+        if 'quoteOrderQty' in params:
+            # The exchange sizes quote orders down to the step size
+            fills = walk_book(levels, quote=float(params['quoteOrderQty']))
+            quantity = quantize.floor_to_step(sum(qty for _, qty in fills), filters['step_size'])
+        else:
+            quantity = float(params['quantity'])
+        fills = walk_book(levels, quantity=quantity)
+        executed = sum(qty for _, qty in fills)
+        quote_amount = sum(price * qty for price, qty in fills)
+        if executed <= 0:
+            raise PaperOrderError(-2010, "Order would immediately match no liquidity.")
+
+        with self.lock:
+            spent, spent_amount = (quote, quote_amount) if side == 'BUY' else (base, executed)
+            received, received_amount = (base, executed) if side == 'BUY' else (quote, quote_amount)
+            if self.balances.get(spent, 0.0) < spent_amount * (1 - 1e-9):
+                raise PaperOrderError(-2010, "Account has insufficient balance for requested action.")
+            fee = received_amount * self.fee_rate
+            self.balances[spent] = max(0.0, self.balances.get(spent, 0.0) - spent_amount)
+            self.balances[received] = self.balances.get(received, 0.0) + received_amount - fee
+            order_id = self.next_order_id
+            self.next_order_id += 1
+            order = {
+                'symbol': symbol,
+                'orderId': order_id,
+                'clientOrderId': f"paper{order_id}",
+                'transactTime': int(time.time() * 1000),
+                'price': '0.00000000',
+                'origQty': f"{quantity:.8f}",
+                'executedQty': f"{executed:.8f}",
+                'cummulativeQuoteQty': f"{quote_amount:.8f}",
+                # A market order the book cannot fill completely expires with the rest unfilled
+                'status': 'FILLED' if executed >= quantity * (1 - 1e-9) else 'EXPIRED',
+                'type': 'MARKET',
+                'side': side,
+                'fills': [{
+                    'price': f"{price:.8f}",
+                    'qty': f"{qty:.8f}",
+                    'commission': f"{(qty if side == 'BUY' else price * qty) * self.fee_rate:.8f}",
+                    'commissionAsset': received,
+                } for price, qty in fills],
+            }
+            self.orders[order_id] = order
+            self._save()
+        return order
+
+    def get_order(self, **params):
+        order = self.orders.get(int(params['orderId']))
+        if order is None:
+            raise PaperOrderError(-2013, "Order does not exist.")
+        return {key: value for key, value in order.items() if key != 'fills'}
+
+    def get_account(self, **params):
+        """The ledger in the get_account() format."""
+        with self.lock:
+            return {
+                'updateTime': int(time.time() * 1000),
+                'balances': [
+                    {'asset': asset, 'free': f"{amount:.8f}", 'locked': '0.00000000'}
+                    for asset, amount in self.balances.items()
+                ],
+            }
+
+    def _dust_values(self, assets):
+        """(asset, amount, USDT value) of every listed asset the exchange would convert to BNB."""
+        prices = price_snapshot.snapshot.get_prices(self.client)
+        btc_price = prices.get('BTCUSDT')
+        result = []
+        for asset in assets:
+            amount = self.balances.get(asset, 0.0)
+            if asset in ('USDT', 'BNB') or amount <= 0:
+                continue
+            value = dust.usdt_value(asset, amount, prices)
+            if value is not None and btc_price and value / btc_price < DUST_MAX_BTC:
+                result.append((asset, amount, value))
+        return result, prices
+
+    def get_dust_assets(self, **params):
+        """The ledger's dust-eligible balances in the get_dust_assets() format."""
+        with self.lock:
+            values, prices = self._dust_values(list(self.balances))
+        btc_price, bnb_price = prices['BTCUSDT'], prices.get('BNBUSDT')
+        details = []
+        for asset, amount, value in values:
+            to_bnb = value / bnb_price if bnb_price else 0.0
+            details.append({
+                'asset': asset, 'assetFullName': asset, 'amountFree': f"{amount:.8f}",
+                'toBTC': f"{value / btc_price:.8f}", 'toBNB': f"{to_bnb:.8f}",
+                'toBNBOffExchange': f"{to_bnb * (1 - DUST_FEE_RATE):.8f}",
+                'exchange': f"{to_bnb * DUST_FEE_RATE:.8f}",
+            })
+        return {'details': details, 'dribbletPercentage': f"{DUST_FEE_RATE}"}
+
+    def transfer_dust(self, **params):
+        """Convert the listed dust balances to BNB in the ledger, in the transfer_dust() format."""
+        assets = [asset for asset in params['asset'].split(',') if asset]
+        with self.lock:
+            values, prices = self._dust_values(assets)
+            bnb_price = prices.get('BNBUSDT')
+            if not bnb_price:
+                raise PaperOrderError(-5002, "No BNB price to convert dust at.")
+            results, total, charge = [], 0.0, 0.0
+            for asset, amount, value in values:
+                bnb = value / bnb_price
+                self.balances[asset] = 0.0
+                self.balances['BNB'] = self.balances.get('BNB', 0.0) + bnb * (1 - DUST_FEE_RATE)
+                total += bnb * (1 - DUST_FEE_RATE)
+                charge += bnb * DUST_FEE_RATE
+                results.append({
+                    'fromAsset': asset, 'amount': f"{amount:.8f}", 'transferedAmount': f"{bnb * (1 - DUST_FEE_RATE):.8f}",
+                    'serviceChargeAmount': f"{bnb * DUST_FEE_RATE:.8f}", 'operateTime': int(time.time() * 1000),
+                })
+            self._save()
+        return {'totalServiceCharge': f"{charge:.8f}", 'totalTransfered': f"{total:.8f}", 'transferResult': results}
+
+def is_enabled():
+    return TRADING_MODE == 'paper'
+
+# Shared ledger installed on the client in paper mode
+broker = PaperBroker()
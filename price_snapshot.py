@@ -0,0 +1,46 @@
+import os
+import time
+import threading
+import config
+
+# Maximum age in seconds before the snapshot is re-fetched
+PRICE_SNAPSHOT_MAX_AGE = float(os.getenv('PRICE_SNAPSHOT_MAX_AGE', 5))
+
+class PriceSnapshot:
+    """Latest price of every symbol, fetched with a single get_all_tickers call."""
+    def __init__(self, max_age=PRICE_SNAPSHOT_MAX_AGE):
+        self.max_age = max_age
+        self.prices = {}
+        self.fetched_at = 0.0
+        self.lock = threading.Lock()
+
+    def is_stale(self):
+        return time.monotonic() - self.fetched_at > self.max_age
+
+    def refresh(self, client):
+        """Replace the snapshot with current prices for all symbols."""
+        tickers = client.get_all_tickers()
+        self.prices = {ticker['symbol']: float(ticker['price']) for ticker in tickers}
+        self.fetched_at = time.monotonic()
+
+    def get_prices(self, client):
+        """Return the price dictionary, refreshing it when older than max_age."""
+        with self.lock:
+            if self.is_stale():
+                self.refresh(client)
+            return self.prices
+
+    def get_price(self, client, symbol):
+        """Return the latest price for a symbol, or None if it is not listed."""
+        return self.get_prices(client).get(symbol)
+
+    def invalidate(self):
+        """Force a refresh on next read, e.g. after trades moved the market."""
+        self.fetched_at = 0.0
+
+# Shared snapshot used by every valuation and sizing path
+snapshot = PriceSnapshot()
+
+def get_price(client, symbol):
+    """Get the latest price of a symbol from the shared snapshot."""
+    return snapshot.get_price(client, symbol)
@@ -0,0 +1,89 @@
+"""
+Order quantization in fixed-point integers.
+
+A step or tick size such as 0.001 is turned once into an integer scale
+(10**3) and a step count (1). Quantities are then floored as integers in
+those units, so the result never exceeds the input and is always an exact
+multiple of the step. Strings sent to the exchange are built from the
+integers, never with float formatting, so there is no scientific notation
+and no rounding up.
+"""
+import math
+from decimal import Decimal
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def step_scale(step_size):
+    """(scale, step units, decimals) of a step or tick size, computed once per distinct size."""
+    exponent = Decimal(repr(float(step_size))).normalize().as_tuple().exponent
+    decimals = max(0, -exponent)
+    scale = 10 ** decimals
+    return scale, max(1, round(step_size * scale)), decimals
+
+def floor_units(quantity, scale):
+    """Largest integer n with n / scale <= quantity, exact for the quantity's decimal value."""
+    units = math.floor(quantity * scale)
+    # quantity * scale can land a hair off an integer in binary floating point
+    if units / scale > quantity:
+        units -= 1
+    elif (units + 1) / scale <= quantity:
+        units += 1
+    return units
+
+def floor_to_step_units(quantity, step_size):
+    """Quantity floored to the step size, in units of 1 / scale. Returns (units, scale, decimals)."""
+    scale, step_units, decimals = step_scale(step_size)
+    units = floor_units(quantity, scale)
+    return units - units % step_units, scale, decimals
+
+def format_units(units, scale, decimals):
+    """Fixed-point string of units / scale with exactly `decimals` places."""
+    if decimals == 0:
+        return str(units)
+    return f"{units // scale}.{units % scale:0{decimals}d}"
+
+def floor_to_step(quantity, step_size):
+    """Round a quantity down to its step size."""
+    units, scale, _ = floor_to_step_units(quantity, step_size)
+    return units / scale
+
+def format_quantity(quantity, step_size):
+    """Round a quantity down to its step size and format it for an order."""
+    return format_units(*floor_to_step_units(quantity, step_size))
+
+def check_order(filters, quantity, price):
+    """
+    Validate a floored quantity against LOT_SIZE and MIN_NOTIONAL before
+    sending it. Returns None when the order passes, otherwise the reason.
+    """
+    if filters['min_qty'] is not None and quantity < filters['min_qty']:
+        return f"quantity {quantity} is below the minimum {filters['min_qty']}"
+    if filters['min_notional'] is not None and price is not None and quantity * price < filters['min_notional']:
+        return f"notional {quantity * price:.2f} is below the minimum {filters['min_notional']}"
+    return None
+
+def quantize_batch(quantities, step_sizes, prices=None, min_qtys=None, min_notionals=None):
+    """
+    Floor many quantities to their step sizes in one vectorized pass.
+    Returns the floored quantities as strings, as floats, and a mask of the
+    orders that pass LOT_SIZE and MIN_NOTIONAL (when prices are given).
+    """
+    import numpy as np
+    quantities = np.asarray(quantities, dtype=np.float64)
+    scales, step_units, decimals = (np.array(column, dtype=np.int64) for column in zip(
+        *(step_scale(float(step)) for step in step_sizes)
+    )) if len(step_sizes) else (np.zeros(0, dtype=np.int64),) * 3
+
+    units = np.floor(quantities * scales).astype(np.int64)
+    units -= (units / scales > quantities)
+    units += ((units + 1) / scales <= quantities)
+    units -= units % step_units
+    floored = units / scales
+
+    valid = units > 0
+    if min_qtys is not None:
+        valid &= floored >= np.nan_to_num(np.asarray(min_qtys, dtype=np.float64))
+    if prices is not None and min_notionals is not None:
+        valid &= floored * np.asarray(prices, dtype=np.float64) >= np.nan_to_num(np.asarray(min_notionals, dtype=np.float64))
+    strings = [format_units(int(u), int(s), int(d)) for u, s, d in zip(units, scales, decimals)]
+    return strings, floored, valid
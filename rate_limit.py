@@ -0,0 +1,211 @@
+import os
+import time
+import threading
+from collections import Counter
+from urllib.parse import urlparse
+import config
+import scheduler
+
+# Binance allows 6000 request weight per minute per IP; stay safely below it
+REQUEST_WEIGHT_PER_MINUTE = int(os.getenv('REQUEST_WEIGHT_PER_MINUTE', 4800))
+
+# Binance allows 100 new orders per 10 seconds per account; keep half as headroom
+ORDERS_PER_10S = int(os.getenv('ORDERS_PER_10S', 50))
+
+# Retries of a request rejected with 429/418, and the longest Retry-After worth waiting for
+RATE_LIMIT_RETRIES = int(os.getenv('RATE_LIMIT_RETRIES', 5))
+RATE_LIMIT_MAX_WAIT = float(os.getenv('RATE_LIMIT_MAX_WAIT', 300))
+
+# Request weight of each REST endpoint the bot uses, by method and path suffix.
+# /sapi endpoints are metered against a separate limit and cost nothing here.
+ENDPOINT_WEIGHTS = {
+    ('GET', 'ping'): 1,
+    ('GET', 'time'): 1,
+    ('GET', 'exchangeInfo'): 20,
+    ('GET', 'klines'): 2,
+    ('GET', 'account'): 20,
+    ('GET', 'order'): 4,
+    ('POST', 'order'): 1,
+    ('POST', 'userDataStream'): 2,
+    ('PUT', 'userDataStream'): 2,
+    ('DELETE', 'userDataStream'): 2,
+}
+DEFAULT_WEIGHT = 1
+
+def endpoint_weight(method, path, params=None):
+    """Request weight of one call; ticker weights depend on whether a symbol is given, depth on the limit."""
+    if '/sapi/' in path:
+        return 0
+    params = params or {}
+    name = path.rsplit('/v3/', 1)[-1]
+    if name == 'ticker/24hr':
+        return 2 if params.get('symbol') else 80
+    if name == 'ticker/price':
+        return 2 if params.get('symbol') else 4
+    if name == 'depth':
+        limit = int(params.get('limit', 100))
+        return 5 if limit <= 100 else 25 if limit <= 500 else 50 if limit <= 1000 else 250
+    return ENDPOINT_WEIGHTS.get((method.upper(), name), DEFAULT_WEIGHT)
+
+class TokenBucket:
+    """Thread-safe token bucket used to pace requests against an exchange budget."""
+    def __init__(self, rate, capacity):
+        self.rate = rate  # tokens refilled per second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens=1):
+        """Block until the requested tokens are available, then consume them."""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def sync_used(self, used):
+        """Count usage reported by the exchange against the budget; never adds tokens."""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, self.capacity - used)
+
+# Shared REST request-weight budget for every module talking to Binance
+request_weight = TokenBucket(REQUEST_WEIGHT_PER_MINUTE / 60, REQUEST_WEIGHT_PER_MINUTE)
+
+# Shared new-order budget for buys and sells
+order_rate = TokenBucket(ORDERS_PER_10S / 10, ORDERS_PER_10S)
+
+def retry_after(response):
+    """Seconds to wait from a Retry-After header, or None when absent."""
+    try:
+        return float(response.headers['Retry-After'])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+class RequestScheduler:
+    """
+    Admits every REST call through the shared weight and order budgets,
+    keeps them in line with the usage headers Binance returns, and backs off
+    and retries when a request is rejected with 429 or 418.
+    """
+    def __init__(self, weight_bucket, order_bucket, retries=RATE_LIMIT_RETRIES, max_wait=RATE_LIMIT_MAX_WAIT):
+        self.weight_bucket = weight_bucket
+        self.order_bucket = order_bucket
+        self.retries = retries
+        self.max_wait = max_wait
+        self.paused_until = 0.0
+        self.used_weight = 0
+        self.rejections = 0
+        self.lock = threading.Lock()
+        self.clients = set()
+
+    def on_response(self, response, *args, **kwargs):
+        """requests response hook: sync the budgets with the exchange's counters."""
+        used = response.headers.get('X-MBX-USED-WEIGHT-1M')
+        if used:
+            self.used_weight = int(used)
+            self.weight_bucket.sync_used(int(used))
+        orders = response.headers.get('X-MBX-ORDER-COUNT-10S')
+        if orders:
+            self.order_bucket.sync_used(int(orders))
+
+    def pause(self, seconds):
+        """Hold back every request for the given number of seconds."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def wait_if_paused(self):
+        wait = self.paused_until - time.monotonic()
+        while wait > 0:
+            time.sleep(wait)
+            wait = self.paused_until - time.monotonic()
+
+    def admit(self, method, path, params=None):
+        """Block until the request fits in the budgets."""
+        self.wait_if_paused()
+        if method.upper() == 'POST' and path.endswith('/order'):
+            self.order_bucket.acquire()
+        weight = endpoint_weight(method, path, params)
+        if weight:
+            self.weight_bucket.acquire(weight)
+
+    def install(self, client):
+        """Route the client's requests through the scheduler."""
+        if id(client) in self.clients:
+            return
+        self.clients.add(id(client))
+        client.session.hooks['response'].append(self.on_response)
+        request = client._request
+
+        def scheduled_request(method, uri, signed, force_params=False, **kwargs):
+            path = urlparse(uri).path
+            for attempt in range(self.retries + 1):
+                self.admit(method, path, kwargs.get('data'))
+                # python-binance signs the data dict in place, so each attempt gets a fresh copy
+                attempt_kwargs = {key: dict(value) if isinstance(value, dict) else value for key, value in kwargs.items()}
+                try:
+                    return request(method, uri, signed, force_params, **attempt_kwargs)
+                except Exception as e:
+                    status = getattr(e, 'status_code', None)
+                    if status not in (418, 429) or attempt == self.retries:
+                        raise
+                    delay = retry_after(getattr(e, 'response', None))
+                    if delay is None:
+                        delay = scheduler.backoff_delay(attempt, base=1, cap=60)
+                    if delay > self.max_wait:
+                        raise
+                    self.rejections += 1
+                    print(f"Rate limited ({status}) on {method.upper()} {path}, retrying in {delay:.1f} s...")
+                    self.pause(delay)
+
+        client._request = scheduled_request
+
+# Shared scheduler installed on the Binance client
+request_scheduler = RequestScheduler(request_weight, order_rate)
+
+class RequestCounter:
+    """Counts REST requests per endpoint on every client it is installed on."""
+    def __init__(self):
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self.clients = set()
+
+    def install(self, client):
+        """Wrap the client's request method so each call is counted."""
+        if id(client) in self.clients:
+            return
+        self.clients.add(id(client))
+        request = client._request
+
+        def counted_request(method, uri, signed, force_params=False, **kwargs):
+            with self.lock:
+                self.counts[f"{method.upper()} {urlparse(uri).path}"] += 1
+            return request(method, uri, signed, force_params, **kwargs)
+
+        client._request = counted_request
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
+
+    def total(self):
+        with self.lock:
+            return sum(self.counts.values())
+
+    def report(self):
+        """Format the per-endpoint counts, most frequent first."""
+        with self.lock:
+            lines = [f"{count:>5}  {endpoint}" for endpoint, count in self.counts.most_common()]
+        return '\n'.join(lines)
+
+# Shared counter of REST calls made during a bot cycle
+request_counter = RequestCounter()
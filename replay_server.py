@@ -0,0 +1,62 @@
+"""
+Local websocket server replaying recorded market stream frames, so the
+streaming mode can run without a connection to Binance.
+Record frames by setting MARKET_STREAM_RECORD_PATH, then point
+MARKET_STREAM_URL at this server.
+
+Usage: python replay_server.py frames.jsonl [port] [delay_ms]
+"""
+import sys
+import json
+import asyncio
+import threading
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+def load_frames(path):
+    with open(path) as f:
+        return [line.rstrip('\n') for line in f if line.strip()]
+
+def make_handler(frames, delay):
+    async def handler(websocket):
+        async def answer_subscriptions():
+            async for raw in websocket:
+                request = json.loads(raw)
+                await websocket.send(json.dumps({'result': None, 'id': request.get('id')}))
+
+        replies = asyncio.ensure_future(answer_subscriptions())
+        try:
+            for frame in frames:
+                await websocket.send(frame)
+                await asyncio.sleep(delay)
+        except ConnectionClosed:
+            return
+        # Keep the connection open like a live stream would
+        try:
+            await replies
+        except ConnectionClosed:
+            pass
+    return handler
+
+async def run(frames, host='localhost', port=8765, delay=0.0, ready=None):
+    async with serve(make_handler(frames, delay), host, port) as server:
+        if ready is not None:
+            ready.set()
+        await server.serve_forever()
+
+def start_in_thread(frames, host='localhost', port=8765, delay=0.0):
+    """Start the replay server on a daemon thread and return once it is listening."""
+    ready = threading.Event()
+    thread = threading.Thread(
+        target=lambda: asyncio.run(run(frames, host, port, delay, ready)), name='replay-server', daemon=True
+    )
+    thread.start()
+    ready.wait(timeout=5)
+    return thread
+
+if __name__ == "__main__":
+    frames = load_frames(sys.argv[1])
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8765
+    delay = (float(sys.argv[3]) if len(sys.argv) > 3 else 0) / 1000
+    print(f"Replaying {len(frames)} frames on ws://localhost:{port}")
+    asyncio.run(run(frames, port=port, delay=delay))
@@ -8,5 +8,5 @@ if [ -d ".venv" ]; then
     source .venv/bin/activate
 fi
 
-# Run the script
-python3 bot.py >> bot.log 2>&1
\ No newline at end of file
+# Run the script; it writes its own rotated bot.log, only tracebacks land here
+python3 bot.py "$@" 2>> bot.err.log
\ No newline at end of file
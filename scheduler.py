@@ -0,0 +1,130 @@
+import os
+import random
+import signal
+import threading
+from datetime import datetime, timedelta, timezone
+import config
+
+# Either an interval in seconds ("3600") or a 5-field cron expression in UTC
+# ("5 0 * * *" runs daily just after the daily candle closes). As in standard
+# cron, when both day of month and day of week are restricted a day matching
+# either runs, and Sunday is 0 or 7.
+BOT_SCHEDULE = os.getenv('BOT_SCHEDULE', '5 0 * * *')
+
+# Jittered exponential backoff between failed cycle attempts
+RETRY_BASE_DELAY = float(os.getenv('RETRY_BASE_DELAY', 30))
+RETRY_MAX_DELAY = float(os.getenv('RETRY_MAX_DELAY', 20 * 60))
+MAX_RETRIES = int(os.getenv('MAX_RETRIES', 10))
+
+# (minimum, maximum) of each cron field: minute, hour, day of month, month, day of week
+CRON_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+def parse_cron_field(field, low, high):
+    """Expand one cron field ('*', '*/n', 'a-b', 'a,b', 'a-b/n') into a set of values."""
+    values = set()
+    for part in field.split(','):
+        step = 1
+        if '/' in part:
+            part, step = part.split('/')
+            step = int(step)
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = map(int, part.split('-'))
+        else:
+            start = end = int(part)
+        if start < low or end > high:
+            raise ValueError(f"Cron value out of range {low}-{high}: {field}")
+        values.update(range(start, end + 1, step))
+    return values
+
+def parse_cron(expr):
+    fields = expr.split()
+    if len(fields) != 5:
+        raise ValueError(f"Cron expression needs 5 fields: {expr}")
+    parsed = [parse_cron_field(field, low, high) for field, (low, high) in zip(fields, CRON_RANGES)]
+    # 7 is another name for Sunday
+    if 7 in parsed[4]:
+        parsed[4] = (parsed[4] - {7}) | {0}
+    return parsed
+
+class Schedule:
+    """Fixed-interval or cron cadence for the bot cycle."""
+    def __init__(self, spec=BOT_SCHEDULE):
+        self.spec = spec.strip()
+        if self.spec.isdigit():
+            self.interval = timedelta(seconds=int(self.spec))
+            self.cron = None
+        else:
+            self.interval = None
+            self.cron = parse_cron(self.spec)
+            # Cron runs on a day matching either day field when both are restricted
+            day_of_month, day_of_week = self.spec.split()[2:5:2]
+            self.either_day = not day_of_month.startswith('*') and not day_of_week.startswith('*')
+
+    def next_run(self, after):
+        """Return the first run time strictly after the given UTC datetime."""
+        if self.interval is not None:
+            return after + self.interval
+        minutes, hours, days, months, weekdays = self.cron
+        candidate = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Walk forward minute by minute; a year bounds every valid expression
+        for _ in range(366 * 24 * 60):
+            day_match = candidate.day in days, (candidate.weekday() + 1) % 7 in weekdays
+            if (candidate.minute in minutes and candidate.hour in hours and candidate.month in months
+                    and (any(day_match) if self.either_day else all(day_match))):
+                return candidate
+            candidate += timedelta(minutes=1)
+        raise ValueError(f"Cron expression never matches: {self.spec}")
+
+def backoff_delay(attempt, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY):
+    """Full-jitter exponential backoff for the given attempt number (0-based)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def run_with_retries(job, stop_event=None, max_retries=MAX_RETRIES, on_give_up=None):
+    """
+    Run job until it succeeds, backing off between failures. Returns True on
+    success. After max_retries + 1 failed attempts, on_give_up(attempts) is
+    called, so the failure can be reported rather than only logged.
+    """
+    stop_event = stop_event or threading.Event()
+    attempts = max_retries + 1
+    for attempt in range(attempts):
+        try:
+            job()
+            return True
+        except Exception as e:
+            if attempt == attempts - 1:
+                print(f"Error in attempt {attempt + 1} of {attempts}: {type(e).__name__}: {e}")
+                break
+            delay = backoff_delay(attempt)
+            print(f"Error in attempt {attempt + 1} of {attempts}: {type(e).__name__}: {e}. "
+                  f"Retrying in {delay:.0f} seconds.")
+            if stop_event.wait(delay):
+                return False
+    print(f"Error: giving up after {attempts} attempts.")
+    if on_give_up is not None:
+        on_give_up(attempts)
+    return False
+
+def install_signal_handlers(stop_event):
+    """Set stop_event on SIGTERM or SIGINT so the current cycle can finish cleanly."""
+    def handle_signal(signum, frame):
+        print(f"Received {signal.Signals(signum).name}, shutting down after the current cycle...")
+        stop_event.set()
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+def run_forever(job, schedule=None, stop_event=None, on_give_up=None):
+    """Run job on the schedule until a shutdown signal arrives. on_give_up is passed to run_with_retries."""
+    schedule = schedule or Schedule()
+    stop_event = stop_event or threading.Event()
+    install_signal_handlers(stop_event)
+    while not stop_event.is_set():
+        now = datetime.now(timezone.utc)
+        next_run = schedule.next_run(now)
+        print(f"Next cycle at {next_run:%Y-%m-%d %H:%M:%S} UTC")
+        if stop_event.wait((next_run - now).total_seconds()):
+            break
+        run_with_retries(job, stop_event, on_give_up=on_give_up)
+    print("Scheduler stopped.")
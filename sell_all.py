@@ -1,172 +1,107 @@
-import os
-import time
-from binance.client import Client
-from dotenv import load_dotenv
-from decimal import Decimal, ROUND_DOWN
-import math
-
-# Load API keys from .env file
-load_dotenv('.env')
-
-API_KEY = os.getenv('BINANCE_API_KEY')
-API_SECRET = os.getenv('BINANCE_API_SECRET')
-
-# Initialize Binance client
-client = Client(API_KEY, API_SECRET)
+from clients import client
+import symbol_filters
+import price_snapshot
+import orders
+import user_stream
+import quantize
+import dust
 
 def get_wallet_balance():
     """Generator that yields assets with positive free balance."""
     try:
-        # Get account information
-        account_info = client.get_account()
-        balances = account_info['balances']
-
-        for balance in balances:
-            free_amount = float(balance['free'])
-            if free_amount > 0:
-                yield {
-                    'asset': balance['asset'],
-                    'free': free_amount,
-                    'locked': float(balance['locked'])
-                }
+        # Get balances from the user-data stream, or the account endpoint without it
+        for balance in user_stream.get_balances(client):
+            if balance['free'] > 0:
+                yield balance
     except Exception as e:
         print(f"Error fetching wallet balance: {e}")
 
 def sell_token(symbol, quantity):
+    """Place a market sell order and wait until it is filled. Returns the order or None."""
     try:
         # Place a market sell order
-        order = client.create_order(
+        order, latency = orders.execute_order(
+            client,
             symbol=symbol,
             side='SELL',
             type='MARKET',
-            quantity=quantity
+            quantity=quantity,
+            expected_price=price_snapshot.get_price(client, symbol)
         )
-        print(f"Sell order successful for {symbol}! Order ID: {order['orderId']}")
-    except Exception as e:
-        print(f"An error occurred while selling {symbol}: {e}")
-
-def get_lot_size(symbol):
-    """Get minimum quantity and step size for a symbol."""
-    try:
-        exchange_info = client.get_symbol_info(symbol)
-        if exchange_info is None:
-            print(f"Symbol info not found for {symbol}")
-            return None, None
-        for f in exchange_info['filters']:
-            if f['filterType'] == 'LOT_SIZE':
-                min_qty = float(f['minQty'])
-                step_size = float(f['stepSize'])
-                return min_qty, step_size
-    except Exception as e:
-        print(f"Error fetching lot size for {symbol}: {e}")
-    return None, None
-
-def adjust_to_step_size(quantity, step_size):
-    """Adjust quantity to comply with step size."""
-    step_size_decimal = Decimal(str(step_size))
-    quantity_decimal = Decimal(str(quantity))
-    # Round down to the nearest multiple of step_size
-    adjusted_qty = (quantity_decimal // step_size_decimal) * step_size_decimal
-    return float(adjusted_qty)
-
-def execute_dust_transfer(assets):
-    """Execute dust transfer for given assets."""
-    try:
-        if not assets:
-            print("No assets to convert to BNB")
-            return
-
-        # Convert the list of assets to a comma-separated string
-        assets_str = ','.join(assets)
-
-        print(f"Converting to BNB: {assets_str}")
-
-        # Call dust transfer with the correct parameter format
-        result = client.transfer_dust(asset=assets_str)
-
-        if 'totalServiceCharge' in result:
-            print("Dust transfer completed:")
-            print(f"Total BNB received: {result.get('totalTransfered', '0')} BNB")
-            print(f"Service charge: {result.get('totalServiceCharge', '0')} BNB")
+        if order['status'] != 'FILLED':
+            print(f"Sell order for {symbol} not filled, status: {order['status']}")
         else:
-            print(f"Dust transfer result: {result}")
-        return result
+            print(f"Sell order successful for {symbol}! Order ID: {order['orderId']} ({latency * 1000:.0f} ms)")
+        return order
     except Exception as e:
-        print(f"Error during dust transfer: {e}")
+        symbol_filters.handle_order_error(e)
+        print(f"An error occurred while selling {symbol}: {e}")
         return None
 
-def main():
-    print("=" * 30)
-    print("\nSelling remaining tokens...")
-    balances = get_wallet_balance()
-
+def plan_sells(balances):
+    """Build the list of (symbol, quantity) sells from one balance snapshot."""
+    symbols, amounts, filters_list = [], [], []
     for balance in balances:
         asset = balance['asset']
         if asset in ['USDT', 'BNB', 'USDTUSDT']:
             continue  # Skip USDT and BNB
 
-        # Fetch the most recent free balance
-        balance_info = client.get_asset_balance(asset=asset)
-        free_amount = float(balance_info['free'])
+        free_amount = balance['free']
         if free_amount == 0:
             continue  # Skip if no free balance available
 
         symbol = f"{asset}USDT"
-        min_qty, step_size = get_lot_size(symbol)
-        if min_qty is None or step_size is None:
+        filters = symbol_filters.get_symbol_filters(client, symbol)
+        if filters is None or filters['min_qty'] is None or filters['step_size'] is None:
             print(f"Lot size info not found for {symbol}. Skipping...")
             continue
-
-        # Adjust quantity to step size and precision
-        quantity = adjust_to_step_size(free_amount, step_size)
-
-        if quantity < min_qty:
-            print(f"Adjusted quantity {quantity} is below minimum {min_qty} for {symbol}. Skipping...")
+        if filters['status'] != 'TRADING':
+            print(f"{symbol} is not currently trading. Skipping...")
+            continue
+        symbols.append(symbol)
+        amounts.append(free_amount)
+        filters_list.append(filters)
+
+    if not symbols:
+        return []
+
+    # Round every quantity down to its step size and check LOT_SIZE and
+    # MIN_NOTIONAL before sending anything
+    prices = [price_snapshot.get_price(client, symbol) for symbol in symbols]
+    quantities, floored, valid = quantize.quantize_batch(
+        amounts,
+        [filters['step_size'] for filters in filters_list],
+        # Without a price the notional check is left to the exchange
+        prices=[price or 0.0 for price in prices],
+        min_qtys=[filters['min_qty'] for filters in filters_list],
+        min_notionals=[
+            filters['min_notional'] if price else None for filters, price in zip(filters_list, prices)
+        ],
+    )
+
+    sells = []
+    for symbol, quantity, amount, price, filters, ok in zip(symbols, quantities, floored, prices, filters_list, valid):
+        if not ok:
+            reason = quantize.check_order(filters, amount, price) or "quantity rounds down to zero"
+            print(f"Adjusted quantity {quantity} for {symbol} cannot be sold: {reason}. Skipping...")
             continue
+        sells.append((symbol, quantity))
+    return sells
 
-        if quantity > free_amount:
-            print(f"Adjusted quantity {quantity} exceeds free amount {free_amount} for {symbol}. Adjusting to available balance.")
-            quantity = adjust_to_step_size(free_amount - step_size, step_size)
-            if quantity < min_qty:
-                print(f"Quantity after adjustment {quantity} is below minimum. Skipping {symbol}.")
-                continue
+def main():
+    print("=" * 30)
+    print("\nSelling remaining tokens...")
+    balances = get_wallet_balance()
 
+    # Plan every sell from one account snapshot, then submit them in parallel
+    sells = plan_sells(balances)
+    for symbol, quantity in sells:
         print(f"Selling {quantity} of {symbol}...")
-        sell_token(symbol, quantity)
-        time.sleep(1)
+    orders.run_concurrently(lambda sell: sell_token(*sell), sells)
 
     print("=" * 30)
     print("Converting dust to BNB...")
-    balances = list(get_wallet_balance())
-    dust_candidates = []
-
-    for balance in balances:
-        asset = balance['asset']
-        free_amount = float(balance['free'])
-        
-        if asset in ['USDT', 'BNB'] or free_amount == 0:
-            continue  # Skip USDT, BNB, and empty balances
-
-        symbol = f"{asset}USDT"
-        try:
-            # Fetch the current price for the symbol
-            ticker = client.get_symbol_ticker(symbol=symbol)
-            price = float(ticker['price'])
-            free_usdt = free_amount * price
-
-            # If the asset's total value is less than 1 USDT, consider it dust
-            if free_usdt < 1:
-                dust_candidates.append(asset)
-        except Exception as e:
-            print(f"Could not get price for {symbol}: {e}")
-            continue  # Skip to the next asset if there's an error
-
-    # Convert all dust assets to BNB at once
-    if dust_candidates:
-        execute_dust_transfer(dust_candidates)
-        time.sleep(5)  # Wait for dust transfer to complete
-    else:
-        print("No assets to convert to BNB")
+    dust.sweep(client)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+Multi-process parameter sweep over the backtest engine.
+
+The price history is saved once as .npy files and memory-mapped read-only by
+every worker, so nothing large is pickled. Parameter combinations are split
+into shards grouped by lookback. Each finished shard is appended to per-column
+binary files in the output directory, which load_results reads back.
+
+Usage: python sweep.py [start_date] [end_date] [output_dir]
+"""
+import os
+import sys
+import json
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import config
+import backtest
+
+SWEEP_WORKERS = int(os.getenv('SWEEP_WORKERS', os.cpu_count() or 1))
+SWEEP_SHARD_SIZE = int(os.getenv('SWEEP_SHARD_SIZE', 500))
+
+# Column name and on-disk dtype of every result field
+RESULT_COLUMNS = [
+    ('lookback', np.int32),
+    ('threshold', np.float64),
+    ('top_n', np.int32),
+    ('final_value', np.float64),
+    ('max_drawdown_percent', np.float64),
+    ('orders', np.int64),
+]
+
+class ColumnarWriter:
+    """Append-only writer storing each result column as a raw binary file."""
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.files = {name: open(os.path.join(directory, f"{name}.bin"), 'wb') for name, _ in RESULT_COLUMNS}
+        self.rows = 0
+
+    def write(self, columns):
+        for name, dtype in RESULT_COLUMNS:
+            np.asarray(columns[name], dtype=dtype).tofile(self.files[name])
+        self.rows += len(columns['lookback'])
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        meta = {'rows': self.rows, 'columns': [[name, np.dtype(dtype).str] for name, dtype in RESULT_COLUMNS]}
+        with open(os.path.join(self.directory, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+def load_results(directory):
+    """Read a sweep output directory back into a DataFrame sorted by final value."""
+    import pandas as pd
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+    columns = {
+        name: np.fromfile(os.path.join(directory, f"{name}.bin"), dtype=np.dtype(dtype))
+        for name, dtype in meta['columns']
+    }
+    return pd.DataFrame(columns).sort_values('final_value', ascending=False)
+
+# Memory-mapped history, opened once per worker process
+_history = {}
+
+def _init_worker(closes_path, steps_path, fallback_index):
+    _history['closes'] = np.load(closes_path, mmap_mode='r')
+    _history['steps'] = np.load(steps_path, mmap_mode='r')
+    _history['fallback_index'] = fallback_index
+
+def _run_shard(shard):
+    lookbacks, thresholds, top_ns = shard
+    final_value, max_drawdown, order_count = backtest.simulate(
+        _history['closes'], np.asarray(_history['steps']), _history['fallback_index'],
+        lookbacks, thresholds, top_ns
+    )
+    return {
+        'lookback': lookbacks,
+        'threshold': thresholds,
+        'top_n': top_ns,
+        'final_value': final_value,
+        'max_drawdown_percent': max_drawdown,
+        'orders': order_count,
+    }
+
+def make_shards(lookbacks, thresholds, top_ns, shard_size=SWEEP_SHARD_SIZE):
+    """Split the parameter grid into shards, keeping equal lookbacks together."""
+    grid = np.array(np.meshgrid(lookbacks, thresholds, top_ns, indexing='ij'), dtype=np.float64).reshape(3, -1).T
+    grid = grid[np.argsort(grid[:, 0], kind='stable')]
+    return [
+        (chunk[:, 0].astype(np.int32), chunk[:, 1], chunk[:, 2].astype(np.int32))
+        for chunk in np.array_split(grid, max(1, -(-len(grid) // shard_size)))
+    ]
+
+def run_sweep(closes, steps, fallback_index, lookbacks, thresholds, top_ns, output_dir,
+              workers=SWEEP_WORKERS, shard_size=SWEEP_SHARD_SIZE):
+    """Backtest every parameter combination across worker processes. Returns the number of rows written."""
+    shards = make_shards(lookbacks, thresholds, top_ns, shard_size)
+    writer = ColumnarWriter(output_dir)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Share the history read-only through memory-mapped files
+        closes_path = os.path.join(tmp_dir, 'closes.npy')
+        steps_path = os.path.join(tmp_dir, 'steps.npy')
+        np.save(closes_path, np.ascontiguousarray(closes, dtype=np.float64))
+        np.save(steps_path, np.asarray(steps, dtype=np.float64))
+
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(closes_path, steps_path, fallback_index)
+        ) as executor:
+            futures = [executor.submit(_run_shard, shard) for shard in shards]
+            try:
+                for future in as_completed(futures):
+                    writer.write(future.result())
+            finally:
+                writer.close()
+    return writer.rows
+
+def main():
+    start_ms = backtest.date_to_ms(sys.argv[1]) if len(sys.argv) > 1 else 0
+    end_ms = backtest.date_to_ms(sys.argv[2]) if len(sys.argv) > 2 else None
+    output_dir = sys.argv[3] if len(sys.argv) > 3 else 'sweep_results'
+
+    times, symbols, closes = backtest.load_history(start_ms, end_ms)
+    if backtest.FALLBACK_SYMBOL not in symbols:
+        print(f"Error: no {backtest.FALLBACK_SYMBOL} history in the kline store. Run 'python backtest.py download <date>' first.")
+        return
+    lookbacks = np.arange(2, 31)
+    thresholds = np.arange(0, 105, 5)
+    top_ns = np.arange(1, 11)
+    print(f"Sweeping {len(lookbacks) * len(thresholds) * len(top_ns)} combinations over "
+          f"{len(times)} days and {len(symbols)} symbols with {SWEEP_WORKERS} workers...")
+    rows = run_sweep(
+        closes, backtest.step_sizes(symbols), symbols.index(backtest.FALLBACK_SYMBOL),
+        lookbacks, thresholds, top_ns, output_dir
+    )
+    print(f"Wrote {rows} results to {output_dir}")
+    print(load_results(output_dir).head(20).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
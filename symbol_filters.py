@@ -0,0 +1,108 @@
+import os
+import json
+import time
+import threading
+import config
+
+SYMBOL_FILTERS_PATH = os.getenv('SYMBOL_FILTERS_PATH', 'symbol_filters.json')
+SYMBOL_FILTERS_TTL = float(os.getenv('SYMBOL_FILTERS_TTL', 6 * 60 * 60))
+
+# Order rejections that mean our cached filters may be out of date
+# (-1013 filter failure, -1121 invalid symbol). -2010 is left out: it also
+# covers insufficient balance, which a refetch of exchangeInfo cannot fix.
+REJECT_CODES = {-1013, -1121}
+
+def parse_symbol(symbol_info):
+    """Extract trading status and the filters we size orders with."""
+    entry = {
+        'status': symbol_info['status'],
+        'base_asset': symbol_info['baseAsset'],
+        'quote_asset': symbol_info['quoteAsset'],
+        'min_qty': None,
+        'step_size': None,
+        'min_notional': None,
+        'tick_size': None,
+        'min_price': None,
+        'max_price': None,
+    }
+    for f in symbol_info['filters']:
+        if f['filterType'] == 'LOT_SIZE':
+            entry['min_qty'] = float(f['minQty'])
+            entry['step_size'] = float(f['stepSize'])
+        elif f['filterType'] in ('MIN_NOTIONAL', 'NOTIONAL'):
+            entry['min_notional'] = float(f['minNotional'])
+        elif f['filterType'] == 'PRICE_FILTER':
+            entry['tick_size'] = float(f['tickSize'])
+            entry['min_price'] = float(f['minPrice'])
+            entry['max_price'] = float(f['maxPrice'])
+    return entry
+
+class SymbolFilterIndex:
+    """Per-symbol filter index built from one exchangeInfo call and cached on disk."""
+    def __init__(self, path=SYMBOL_FILTERS_PATH, ttl=SYMBOL_FILTERS_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.symbols = {}
+        self.fetched_at = 0.0
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Load the last snapshot from disk so a cold start can skip the network."""
+        try:
+            with open(self.path) as f:
+                snapshot = json.load(f)
+            self.symbols = snapshot['symbols']
+            self.fetched_at = snapshot['fetched_at']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'fetched_at': self.fetched_at, 'symbols': self.symbols}, f)
+        os.replace(tmp_path, self.path)
+
+    def is_stale(self):
+        return time.time() - self.fetched_at > self.ttl
+
+    def refresh(self, client):
+        """Rebuild the index from a single exchangeInfo call."""
+        exchange_info = client.get_exchange_info()
+        self.symbols = {s['symbol']: parse_symbol(s) for s in exchange_info['symbols']}
+        self.fetched_at = time.time()
+        try:
+            self._save()
+        except OSError as e:
+            print(f"Error saving symbol filters: {e}")
+
+    def invalidate(self):
+        """Force a refresh on next lookup."""
+        self.fetched_at = 0.0
+
+    def get(self, client, symbol):
+        """Return the filters for a symbol, refreshing the index when stale."""
+        with self.lock:
+            if self.is_stale() or not self.symbols:
+                self.refresh(client)
+            return self.symbols.get(symbol)
+
+# Shared index used by every module
+index = SymbolFilterIndex()
+
+def get_symbol_filters(client, symbol):
+    """Get the cached filters for a symbol, or None if it does not exist."""
+    try:
+        filters = index.get(client, symbol)
+        if filters is None:
+            print(f"Symbol info not found for {symbol}")
+        return filters
+    except Exception as e:
+        print(f"Error fetching symbol filters for {symbol}: {e}")
+        return None
+
+def handle_order_error(e):
+    """Invalidate the cached filters when an order was rejected by a filter check."""
+    # BinanceAPIException carries the exchange error code
+    if getattr(e, 'code', None) in REJECT_CODES:
+        index.invalidate()
@@ -1,131 +1,221 @@
 import os
-import requests
-import pandas as pd
-from binance.client import Client
-from datetime import datetime, timedelta
-from dotenv import load_dotenv
+from datetime import datetime, timezone
+import config
+import kline_store
+import universe
+from clients import client
 
-# Load API keys from .env file
-load_dotenv('.env')
-API_KEY = os.getenv('BINANCE_API_KEY')
-API_SECRET = os.getenv('BINANCE_API_SECRET')
+# Momentum scans as interval:lookback candles:minimum percent change over the
+# lookback, comma-separated, e.g. "5m:12:2,1h:24:5,1d:7:30". A symbol must
+# pass every scan; the first one ranks the gainers.
+SCAN_INTERVALS = os.getenv('SCAN_INTERVALS', '1d:7:30')
+# 'market_cap' scans the CoinGecko top UNIVERSE_SIZE, 'all' every USDT pair
+SCAN_UNIVERSE = os.getenv('SCAN_UNIVERSE', 'market_cap')
 
-client = Client(API_KEY, API_SECRET)
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000, '8h': 28_800_000,
+    '12h': 43_200_000, '1d': 86_400_000, '3d': 259_200_000, '1w': 604_800_000,
+}
+
+def parse_scans(spec):
+    """Parse SCAN_INTERVALS into (interval, lookback, min_change_percent) tuples."""
+    scans = []
+    for item in spec.split(','):
+        interval, lookback, min_change = item.strip().split(':')
+        if interval not in INTERVAL_MS:
+            raise ValueError(f"Unknown kline interval {interval!r} in SCAN_INTERVALS")
+        scans.append((interval, int(lookback), float(min_change)))
+    return scans
+
+SCANS = parse_scans(SCAN_INTERVALS)
+
+# 'rest' polls Binance on every scan; 'stream' reads websocket-fed market state
+MARKET_DATA_MODE = os.getenv('MARKET_DATA_MODE', 'rest')
+
+# Live market state when streaming is enabled
+market = None
+# Candle ring buffer per scanned (interval, lookback), kept across cycles
+rings = {}
 
 def get_top_200_symbols_with_data():
     """
-    Fetch top 200 cryptocurrencies by market capitalization from CoinGecko API.
+    Top 200 cryptocurrencies by market capitalization, from the cached CoinGecko universe.
     Returns a list of dictionaries with symbol and rank.
     """
     try:
-        # CoinGecko API endpoint for top cryptocurrencies
-        url = "https://api.coingecko.com/api/v3/coins/markets"
-        params = {
-            'vs_currency': 'usd',
-            'order': 'market_cap_desc',
-            'per_page': 200,
-            'page': 1,
-            'sparkline': False
-        }
-        
-        response = requests.get(url, params=params)
-        data = response.json()
-        
-        # Create a list of dictionaries with symbol and rank
-        top_200_data = [
-            {
-                'symbol': f"{coin['symbol'].upper()}USDT", 
-                'rank': coin['market_cap_rank']
-            } 
-            for coin in data
-        ]
-        return top_200_data
-    
+        return universe.market_caps.get()
     except Exception as e:
         print(f"Error fetching top 200 cryptocurrencies: {e}")
         return []
 
-def get_top_gainers():
-    # Get top 200 symbols with their ranks
-    top_200_data = get_top_200_symbols_with_data()
-    
-    # Create a dictionary for easy rank lookup
-    top_200_ranks = {item['symbol']: item['rank'] for item in top_200_data}
-    top_200_symbols = list(top_200_ranks.keys())
-    
-    # Get all ticker prices
-    all_tickers = client.get_ticker()
-    
-    # Initialize list to store data
-    crypto_data = []
-    
-    # Process each ticker
-    for ticker in all_tickers:
-        symbol = ticker['symbol']
-        
-        # Filter for USDT pairs in top 200
-        if symbol.endswith('USDT') and symbol in top_200_symbols:
-            try:
-                # Fetch 7-day historical price data
-                klines = client.get_historical_klines(symbol, Client.KLINE_INTERVAL_1DAY, "7 day ago UTC")
-                if len(klines) < 7:
-                    continue  # Not enough data
-                
-                # Get closing prices
-                close_prices = [float(kline[4]) for kline in klines]
-                current_price = close_prices[-1]
-                seven_days_ago_price = close_prices[0]
-                week_change = ((current_price - seven_days_ago_price) / seven_days_ago_price) * 100
-
-                # 24h Price Change Percent
-                price_change_percent_24h = float(ticker['priceChangePercent'])
-
-                # 24h Volume
-                volume_24h = float(ticker['quoteVolume'])
-
-                crypto_data.append({
-                    'symbol': symbol,
-                    'market_cap_rank': top_200_ranks[symbol],
-                    'current_price': current_price,
-                    'week_price_change_percent': week_change,
-                    '24h_price_change_percent': price_change_percent_24h,
-                    '24h_volume': volume_24h
-                })
-            except Exception as e:
-                print(f"Error processing {symbol}: {e}")
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(crypto_data)
-    
-    # Filter for cryptos with positive 24h gains
-    # And with more than 30% weekly gains
-    df_filtered = df[
-        (df['24h_price_change_percent'] > 0) & 
-        (df['week_price_change_percent'] > 30)
+def window_start_ms(interval, lookback):
+    """Open time from which the last `lookback` candles of an interval are loaded."""
+    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    return now_ms - lookback * INTERVAL_MS[interval]
+
+def get_ring(interval, lookback):
+    import candles
+    ring = rings.get((interval, lookback))
+    if ring is None:
+        ring = rings[(interval, lookback)] = candles.CandleRing(interval, lookback)
+    return ring
+
+def scan_intervals():
+    """Distinct scanned intervals, in SCANS order, with the lookbacks scanned on each."""
+    lookbacks = {}
+    for interval, lookback, _ in SCANS:
+        if lookback not in lookbacks.setdefault(interval, []):
+            lookbacks[interval].append(lookback)
+    return lookbacks
+
+def load_rings(symbols):
+    """
+    Bring every scan's ring up to date over REST, with one kline load per
+    interval for its longest lookback. Returns the symbols whose fetch
+    failed: their rings still hold an older window.
+    """
+    failed = set()
+    for interval, lookbacks in scan_intervals().items():
+        interval_rings = [get_ring(interval, lookback) for lookback in lookbacks]
+        # Only candles newer than the last stored one are downloaded
+        for result in kline_store.load_klines(client, symbols, interval, window_start_ms(interval, max(lookbacks))):
+            if result['error'] is not None:
+                print(f"Error processing {result['symbol']}: {result['error']}")
+                failed.add(result['symbol'])
+                continue
+            for ring in interval_rings:
+                ring.extend(result['symbol'], result['klines'])
+    return failed
+
+def prune_store():
+    """
+    Delete stored intraday candles older than their interval's longest scanned
+    lookback, so the store stays bounded. Daily and longer candles are kept
+    for the backtest.
+    """
+    try:
+        store = kline_store.get_store()
+        for interval, lookbacks in scan_intervals().items():
+            if INTERVAL_MS[interval] < INTERVAL_MS['1d']:
+                # One candle of margin, as the window starts inside the oldest candle
+                store.prune(interval, window_start_ms(interval, max(lookbacks) + 1))
+    except Exception as e:
+        print(f"Error pruning the kline store: {e}")
+
+def change_column(interval, lookback):
+    """DataFrame column of a scan's change; the lookback is added when two scans share an interval."""
+    if len(scan_intervals()[interval]) > 1:
+        return f"{interval}_{lookback}_change_percent"
+    return f"{interval}_change_percent"
+
+def scan_symbols(tickers):
+    """USDT pairs to scan: the market-cap universe, or every pair with SCAN_UNIVERSE=all."""
+    if SCAN_UNIVERSE == 'all':
+        return [ticker['symbol'] for ticker in tickers if ticker['symbol'].endswith('USDT')]
+    get_top_200_symbols_with_data()
+    return [
+        ticker['symbol'] for ticker in tickers
+        if ticker['symbol'].endswith('USDT') and ticker['symbol'] in universe.market_caps.symbols
     ]
-    
-    # Sort by 7-day price change
-    df_sorted = df_filtered.sort_values('week_price_change_percent', ascending=False)
-    
+
+def start_streaming():
+    """
+    Backfill the candle rings once over REST, then keep them and the tickers
+    current from websocket streams, one kline stream per scanned interval.
+    """
+    global market
+    import market_stream
+    symbols = scan_symbols(client.get_ticker())
+    load_rings(symbols)
+    interval_rings = {
+        interval: [get_ring(interval, lookback) for lookback in lookbacks]
+        for interval, lookbacks in scan_intervals().items()
+    }
+
+    def on_kline(symbol, interval, kline):
+        # Each kline event moves the rings of its interval forward in O(1)
+        for ring in interval_rings[interval]:
+            ring.update(symbol, int(kline[0]), float(kline[4]), float(kline[7]))
+
+    market = market_stream.MarketStream(symbols, list(interval_rings))
+    market.on_kline = on_kline
+    market.start()
+    if not market.wait_until_ready():
+        print("Error: market stream sent no ticker data yet, scanning over REST until it does")
+
+def stop_streaming():
+    """Stop the websocket streams and go back to REST polling."""
+    global market
+    if market is not None:
+        market.stop()
+        market = None
+
+def get_top_gainers(factors=None):
+    import numpy as np
+    import pandas as pd
+    import momentum
+
+    # Get all ticker prices, from the live stream when it has data
+    all_tickers = market.get_tickers() if market is not None else []
+    streaming = bool(all_tickers)
+    if not streaming:
+        all_tickers = client.get_ticker()
+
+    symbols = scan_symbols(all_tickers)
+    # Bring the rings up to date; the stream already does this as candles arrive
+    if not streaming:
+        # Symbols whose fetch failed are skipped, as their windows are out of date
+        failed = load_rings(symbols)
+        symbols = [symbol for symbol in symbols if symbol not in failed]
+    prune_store()
+    tickers = {ticker['symbol']: ticker for ticker in all_tickers}
+    candidates = [tickers[symbol] for symbol in symbols]
+
+    changes = {(interval, lookback): get_ring(interval, lookback).change(symbols) for interval, lookback, _ in SCANS}
+
+    # Score the ranking interval's (symbols x lookback) window in one pass, then apply the other scans
+    interval, lookback, min_change = SCANS[0]
+    closes, volumes = rings[(interval, lookback)].window(symbols)
+    change_24h = np.array([float(ticker['priceChangePercent']) for ticker in candidates], dtype=np.float64)
+    selected, columns = momentum.score(closes, volumes, change_24h, min_change, factors)
+    columns.pop('week_price_change_percent')
+    for other_interval, other_lookback, other_min_change in SCANS[1:]:
+        selected = selected[changes[(other_interval, other_lookback)][selected] > other_min_change]
+
+    ranks = universe.market_caps.ranks
+    df_sorted = pd.DataFrame({
+        'symbol': [symbols[i] for i in selected],
+        'market_cap_rank': [ranks.get(symbols[i], '-') for i in selected],
+        'current_price': closes[selected, -1],
+        **{change_column(*scan): change[selected] for scan, change in changes.items()},
+        '24h_price_change_percent': change_24h[selected],
+        '24h_volume': [float(candidates[i]['quoteVolume']) for i in selected],
+        **{name: values[selected] for name, values in columns.items()}
+    })
+
     return df_sorted
 
 def display_results(df, top_n=5):
-    print("\nTop", top_n, "Gainers in the Last 7 Days (Top 200, >30% Weekly Gain, Positive 24h Change):")
+    interval, lookback, min_change = SCANS[0]
+    print(f"\nTop {top_n} Gainers over {lookback} x {interval} candles (>{min_change:g}% gain, positive 24h change):")
     print("=" * 100)
-    print(f"{'Rank':<6}{'Symbol':<12}{'Current Price':<15}{'7d Change':<12}{'24h Change':<12}{'24H Volume':<20}")
+    print(f"{'Rank':<6}{'Symbol':<12}{'Current Price':<15}{f'{interval} Change':<12}{'24h Change':<12}{'24H Volume':<20}")
     print("-" * 100)
-    
+
     for idx, row in df.head(top_n).iterrows():
         print(
             f"{row['market_cap_rank']:<6}"
             f"{row['symbol']:<12} "
             f"${row['current_price']:<12.4f} "
-            f"{row['week_price_change_percent']:>7.2f}% "
+            f"{row[change_column(interval, lookback)]:>7.2f}% "
             f"{row['24h_price_change_percent']:>10.2f}% "
             f"{row['24h_volume']:>20,.2f}"
         )
 
 if __name__ == "__main__":
+    if MARKET_DATA_MODE == 'stream':
+        start_streaming()
     print("Fetching and analyzing crypto data from Binance...")
     results = get_top_gainers()
     display_results(results)
@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import threading
+import config
+import http_session
+
+COINGECKO_URL = os.getenv('COINGECKO_URL', 'https://api.coingecko.com/api/v3')
+UNIVERSE_PATH = os.getenv('UNIVERSE_PATH', 'universe.json')
+# Market-cap ranks barely move within an hour
+UNIVERSE_TTL = float(os.getenv('UNIVERSE_TTL', 60 * 60))
+UNIVERSE_SIZE = 200
+
+class MarketCapUniverse:
+    """
+    Top coins by market capitalization from CoinGecko, cached on disk with a TTL.
+    A failed refresh keeps serving the last good snapshot.
+    """
+    def __init__(self, path=UNIVERSE_PATH, ttl=UNIVERSE_TTL, size=UNIVERSE_SIZE):
+        self.path = path
+        self.ttl = ttl
+        self.size = size
+        self.coins = []
+        self.ranks = {}
+        self.symbols = frozenset()
+        self.etag = None
+        self.fetched_at = 0.0
+        self.lock = threading.Lock()
+        self._load()
+
+    def _set_coins(self, coins):
+        self.coins = coins
+        self.ranks = {coin['symbol']: coin['rank'] for coin in coins}
+        self.symbols = frozenset(self.ranks)
+
+    def _load(self):
+        """Load the last snapshot from disk so a cold start can skip the network."""
+        try:
+            with open(self.path) as f:
+                snapshot = json.load(f)
+            self._set_coins(snapshot['coins'])
+            self.etag = snapshot.get('etag')
+            self.fetched_at = snapshot['fetched_at']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'fetched_at': self.fetched_at, 'etag': self.etag, 'coins': self.coins}, f)
+        os.replace(tmp_path, self.path)
+
+    def is_stale(self):
+        return time.time() - self.fetched_at > self.ttl
+
+    def refresh(self):
+        """Download the top coins, revalidating with the last ETag when there is one."""
+        params = {
+            'vs_currency': 'usd',
+            'order': 'market_cap_desc',
+            'per_page': self.size,
+            'page': 1,
+            'sparkline': False
+        }
+        headers = {'If-None-Match': self.etag} if self.etag and self.coins else {}
+        response = http_session.get(f"{COINGECKO_URL}/coins/markets", params=params, headers=headers)
+        if response.status_code != 304:
+            response.raise_for_status()
+            self._set_coins([
+                {'symbol': f"{coin['symbol'].upper()}USDT", 'rank': coin['market_cap_rank']}
+                for coin in response.json()
+            ])
+            self.etag = response.headers.get('ETag')
+        self.fetched_at = time.time()
+        try:
+            self._save()
+        except OSError as e:
+            print(f"Error saving market-cap universe: {e}")
+
+    def invalidate(self):
+        """Force a refresh on next lookup."""
+        self.fetched_at = 0.0
+
+    def get(self):
+        """Return the current coins, refreshing when stale and falling back to the last snapshot."""
+        with self.lock:
+            if self.is_stale() or not self.coins:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    if not self.coins:
+                        raise
+                    print(f"Error refreshing market-cap universe: {e}; using the last good snapshot")
+            return self.coins
+
+# Shared universe used by every scan
+market_caps = MarketCapUniverse()
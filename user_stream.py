@@ -0,0 +1,234 @@
+import os
+import json
+import asyncio
+import threading
+import config
+
+# Raw user-data stream endpoint; the listen key is appended to it
+USER_STREAM_URL = os.getenv('USER_STREAM_URL', 'wss://stream.binance.com:9443/ws')
+# 'stream' keeps balances and order states from the user-data stream; 'rest' polls get_account
+ACCOUNT_DATA_MODE = os.getenv('ACCOUNT_DATA_MODE', 'stream')
+
+# Listen keys expire after 60 minutes without a keepalive
+LISTEN_KEY_KEEPALIVE = 30 * 60
+RECONNECT_DELAY_MAX = 60
+# Order updates kept for orders nobody is waiting on
+MAX_TRACKED_ORDERS = 1000
+
+def order_from_event(event):
+    """Convert an executionReport event to the get_order() REST format."""
+    return {
+        'symbol': event['s'],
+        'orderId': event['i'],
+        'clientOrderId': event['c'],
+        'side': event['S'],
+        'type': event['o'],
+        'status': event['X'],
+        'origQty': event['q'],
+        'executedQty': event['z'],
+        'cummulativeQuoteQty': event['Z'],
+        'updateTime': event['T'],
+    }
+
+class UserStream:
+    """
+    Balance book and order states kept current by the user-data stream.
+    The book starts from one get_account snapshot; outboundAccountPosition,
+    balanceUpdate and executionReport events keep it up to date.
+    """
+    def __init__(self, client, url=USER_STREAM_URL):
+        self.client = client
+        self.url = url
+        self.balances = {}
+        self.balance_times = {}
+        self.account_updated = 0
+        self.orders = {}
+        self.changed = threading.Condition()
+        self.ready = threading.Event()
+        self.loop = None
+        self.thread = None
+        self.websocket = None
+        self.stopping = False
+
+    def load_account(self, account):
+        """Seed the book from a get_account() snapshot."""
+        updated = account.get('updateTime', 0)
+        with self.changed:
+            for balance in account['balances']:
+                asset = balance['asset']
+                if self.balance_times.get(asset, 0) <= updated:
+                    self.balances[asset] = (float(balance['free']), float(balance['locked']))
+                    self.balance_times[asset] = updated
+            self.account_updated = max(self.account_updated, updated)
+            self.changed.notify_all()
+
+    def handle_message(self, raw):
+        """Apply one user-data event to the balance book and order states."""
+        event = json.loads(raw)
+        kind = event.get('e')
+        with self.changed:
+            if kind == 'outboundAccountPosition':
+                for balance in event['B']:
+                    # Skip positions older than what the snapshot already holds
+                    if self.balance_times.get(balance['a'], 0) <= event['u']:
+                        self.balances[balance['a']] = (float(balance['f']), float(balance['l']))
+                        self.balance_times[balance['a']] = event['u']
+                self.account_updated = max(self.account_updated, event['u'])
+            elif kind == 'balanceUpdate':
+                free, locked = self.balances.get(event['a'], (0.0, 0.0))
+                self.balances[event['a']] = (free + float(event['d']), locked)
+            elif kind == 'executionReport':
+                self.orders[event['i']] = order_from_event(event)
+                while len(self.orders) > MAX_TRACKED_ORDERS:
+                    self.orders.pop(next(iter(self.orders)))
+            elif kind == 'listenKeyExpired' and self.websocket is not None:
+                asyncio.ensure_future(self.websocket.close())
+            self.changed.notify_all()
+
+    def get_balances(self):
+        """Free and locked amount of every asset with a nonzero balance."""
+        with self.changed:
+            return [
+                {'asset': asset, 'free': free, 'locked': locked}
+                for asset, (free, locked) in self.balances.items() if free or locked
+            ]
+
+    def wait_for_order(self, order_id, final_statuses, timeout):
+        """
+        Block until the order reaches a final status and, when it filled
+        anything, the balance book reflects it. Returns the latest order
+        update seen, or None.
+        """
+        def settled():
+            order = self.orders.get(order_id)
+            if not self.ready.is_set():
+                return True
+            if order is None or order['status'] not in final_statuses:
+                return False
+            # An order that filled nothing moves no balance, so no account update follows it
+            return float(order['executedQty']) == 0 or self.account_updated >= order['updateTime']
+
+        with self.changed:
+            self.changed.wait_for(settled, timeout)
+            return self.orders.get(order_id)
+
+    def wait_for_balances(self, predicate, timeout):
+        """Block until predicate({asset: free}) holds. Returns whether it did."""
+        with self.changed:
+            return self.changed.wait_for(
+                lambda: predicate({asset: free for asset, (free, _) in self.balances.items()}), timeout
+            )
+
+    async def _keepalive(self, listen_key):
+        while True:
+            await asyncio.sleep(LISTEN_KEY_KEEPALIVE)
+            try:
+                await self.loop.run_in_executor(None, self.client.stream_keepalive, listen_key)
+            except Exception as e:
+                print(f"Error keeping the user data stream alive: {e}")
+
+    async def _run(self):
+        import websockets
+        delay = 1
+        while not self.stopping:
+            try:
+                listen_key = await self.loop.run_in_executor(None, self.client.stream_get_listen_key)
+                async with websockets.connect(f"{self.url}/{listen_key}") as websocket:
+                    self.websocket = websocket
+                    # Snapshot after connecting so no update falls in between
+                    account = await self.loop.run_in_executor(None, self.client.get_account)
+                    self.load_account(account)
+                    self.ready.set()
+                    delay = 1
+                    keepalive = asyncio.ensure_future(self._keepalive(listen_key))
+                    try:
+                        async for raw in websocket:
+                            self.handle_message(raw)
+                    finally:
+                        keepalive.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in user data stream: {e}. Reconnecting in {delay}s.")
+            finally:
+                # Readers fall back to REST while disconnected
+                self.ready.clear()
+                with self.changed:
+                    self.changed.notify_all()
+            if not self.stopping:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_DELAY_MAX)
+
+    def start(self):
+        """Run the stream on a background thread."""
+        self.stopping = False
+        self.loop = asyncio.new_event_loop()
+        self.task = self.loop.create_task(self._run())
+        self.thread = threading.Thread(target=self._thread_main, name='user-stream', daemon=True)
+        self.thread.start()
+
+    def _thread_main(self):
+        try:
+            self.loop.run_until_complete(self.task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.loop.close()
+
+    def wait_until_ready(self, timeout=10):
+        """Block until the balance book holds its first snapshot."""
+        return self.ready.wait(timeout)
+
+    def stop(self):
+        """Close the connection and wait for the background thread to exit."""
+        self.stopping = True
+        if self.loop is None:
+            return
+        if self.websocket is not None:
+            # A clean close ends the receive loop; cancel only if that hangs
+            asyncio.run_coroutine_threadsafe(self.websocket.close(), self.loop)
+            self.thread.join(timeout=5)
+        if self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.task.cancel)
+            self.thread.join(timeout=5)
+
+# Live account state when the user-data stream is running
+stream = None
+
+def start(client):
+    """Start the user-data stream and wait for its first balance snapshot."""
+    global stream
+    stream = UserStream(client)
+    stream.start()
+    if not stream.wait_until_ready():
+        print("Error: user data stream not ready yet, reading balances over REST until it is")
+
+def stop():
+    global stream
+    if stream is not None:
+        stream.stop()
+        stream = None
+
+def is_live():
+    return stream is not None and stream.ready.is_set()
+
+def get_balances(client):
+    """
+    Free and locked amount of every asset with a nonzero balance, from the
+    balance book when the stream is live, otherwise from one get_account call.
+    """
+    if is_live():
+        return stream.get_balances()
+    account = client.get_account()
+    balances = []
+    for balance in account['balances']:
+        free, locked = float(balance['free']), float(balance['locked'])
+        if free or locked:
+            balances.append({'asset': balance['asset'], 'free': free, 'locked': locked})
+    return balances
+
+def wait_for_balances(predicate, timeout):
+    """Wait on the balance book; returns None when the stream is not live."""
+    if not is_live():
+        return None
+    return stream.wait_for_balances(predicate, timeout)